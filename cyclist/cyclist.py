@@ -1,9 +1,15 @@
 """The CycliST main file for controlling the dataset generation."""
 
 # Standard Library
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+import multiprocessing
 import subprocess
+import tempfile
 import json
 import os
+import traceback
+from typing import Any, Callable
 
 # Third Party
 import numpy as np
@@ -14,7 +20,18 @@ import sys
 from rtpt import RTPT
 import time
 from .scene.cycle import Cycle
-from .utility import get_frame
+from .scene.streams import RandomStreams
+from .scene.trajectory import hyperperiod
+from .scene.encoder import (
+    FRAME_EXTENSIONS,
+    get_frame_tensors,
+    get_video_variants,
+    submit_encoding,
+    wait_for_encodings,
+)
+from .scene.worker import CALIBRATED, get_render_worker
+from .manifest import Manifest, fingerprint, scene_outputs
+from .utility import encode_intervals, get_location_periods, get_locations, serialize_scene_config, tile_frames
 
 
 class CycliST:
@@ -30,9 +47,49 @@ class CycliST:
         self.generator = Generator(scene_config)
         self.cycle = Cycle(scene_config)
 
+        # The background encoding of the rendered frames, if any
+        self.encoding = None
+
+    @property
+    def scene_config_file_path(self) -> str:
+        """The path the scene configuration is written to."""
+
+        return os.path.join(
+            self.scene_config["scene_config_directory"],
+            self.scene_config["scene_config_file"],
+        )
+
     def run(self) -> bool:
-        # Set the scene's own random seed (base seed + scene_index)
-        np.random.seed(self.scene_config["seed"] + self.scene_config["scene_index"])
+        """Generates, renders and labels a scene.
+
+        With plan_only, the scene is not rendered and only labelled if directions are given by directions_path.
+
+        Returns:
+            False if the scene could not be generated or rendered, else True
+        """
+
+        if not self.plan():
+            return False
+
+        if self.scene_config["plan_only"]:
+            if self.scene_config["directions_path"] is not None:
+                self.scene_config["directions"] = load_directions(self.scene_config["directions_path"])
+                self.label()
+
+            return True
+
+        self.render()
+        self.label()
+        self.encode()
+
+        return self.scene_config["rendered"]
+
+    def plan(self) -> bool:
+        """Generates the scene's objects, cycles and lights and writes the pre-rendering scene configuration.
+
+        Returns:
+            False if the scene could not be generated, else True
+        """
 
         # Create randomized objects in scene
         while not self.generator.generate():
@@ -43,7 +100,8 @@ class CycliST:
 
         # Setup lights
         if self.scene_config['cyclic_lights']:
-            self.cycle.apply_light()
+            streams = RandomStreams(self.scene_config["seed"], self.scene_config["scene_index"])
+            self.cycle.apply_light(streams.get("cycles"))
 
         # Indicate that scene has not been rendered yet
         self.scene_config["rendered"] = False
@@ -59,16 +117,64 @@ class CycliST:
             f"{self.scene_config['split']}_{self.scene_config['scene_index']}.blend"
         )
 
-        # Write-out pre-rendering scene configuration
-        scene_config_file_path = os.path.join(
-            self.scene_config["scene_config_directory"],
-            self.scene_config["scene_config_file"],
-        )
-        with open(scene_config_file_path, "w") as scene_config_file:
-            json.dump(self.scene_config, scene_config_file, indent=2)
+        # Write-out pre-rendering scene configuration, expanding per-frame states into JSON
+        with open(self.scene_config_file_path, "w") as scene_config_file:
+            json.dump(serialize_scene_config(self.scene_config), scene_config_file, indent=2)
+
+        return True
+
+    def render(self) -> None:
+        """Renders the written scene configuration with Blender and reloads it with the render info."""
 
-        # Render video
         print("Start rendering ...")
+        start = time.time()
+        frame_processes = self.scene_config.get("frame_processes", 1)
+        if frame_processes > 1 and self.scene_config.get("frame_format", "FFMPEG") not in FRAME_EXTENSIONS:
+            print("Rendering frames in parallel requires a --frame_format other than FFMPEG, using a single process.")
+            frame_processes = 1
+
+        # Only a single period is rendered unless all frames are asked for, each process needs at least one frame
+        rendered_frames = int(self.scene_config["fps"] * self.scene_config["duration"])
+        if not self.scene_config.get("render_all_frames", False):
+            rendered_frames = hyperperiod(self.scene_config)
+        frame_processes = min(frame_processes, rendered_frames)
+
+        if frame_processes > 1:
+            success = self.render_frames(frame_processes)
+        elif self.scene_config["persistent_blender"]:
+            success = get_render_worker().render(self.scene_config_file_path)
+        else:
+            success = self.render_once()
+
+        # Update scene config with render info (directions, time, rendered indicator,...)
+        with open(self.scene_config_file_path, "r") as scene_config_file:
+            self.scene_config = json.load(scene_config_file)
+        if frame_processes > 1:
+            self.scene_config["rendered"] = success and self.scene_config["rendered"]
+            self.scene_config["render_time"] = time.time() - start
+        # print(f"... took {self.scene_config['render_time']} seconds")
+
+        # Rendered frames are encoded into these videos and frame tensors after labelling
+        if self.scene_config.get("frame_format", "FFMPEG") in FRAME_EXTENSIONS and self.scene_config["rendered"]:
+            self.scene_config["video_variants"] = get_video_variants(self.scene_config)
+            self.scene_config["frame_tensors"] = get_frame_tensors(self.scene_config)
+
+    def encode(self) -> None:
+        """Encodes the rendered frames in the background while the next scene is rendered.
+
+        Submitted only once the labelled scene configuration is written, which a failed encoding marks as not rendered.
+        """
+
+        if self.scene_config.get("frame_format", "FFMPEG") in FRAME_EXTENSIONS and self.scene_config["rendered"]:
+            self.encoding = submit_encoding(self.scene_config)
+
+    def render_once(self) -> bool:
+        """Renders the written scene configuration in a Blender process of its own.
+
+        Returns:
+            True if Blender exited successfully, False otherwise
+        """
+
         completed = subprocess.run(
             [
                 "blender",
@@ -77,7 +183,7 @@ class CycliST:
                 "cyclist/scene/renderer.py",
                 "--",
                 "--scene_config",
-                self.scene_config['scene_config_directory'] + "/" + self.scene_config['scene_config_file'],
+                self.scene_config_file_path,
             ],
             capture_output=True,
             text=True,
@@ -85,10 +191,101 @@ class CycliST:
         if completed.stderr:
             print(completed.stderr)
 
-        # Update scene config with render info (directions, time, rendered indicator,...)
-        with open(scene_config_file_path, "r") as scene_config_file:
-            self.scene_config = json.load(scene_config_file)
-        # print(f"... took {self.scene_config['render_time']} seconds")
+        return completed.returncode == 0
+
+    def render_frames(self, frame_processes: int) -> bool:
+        """Renders the frames of the written scene configuration split among Blender processes running in parallel.
+
+        Each process renders a contiguous range of frames with its own thread budget (--render_threads).
+        The frames are numbered by Blender, so the encoding stage stitches them in order.
+
+        Args:
+            frame_processes: The number of Blender processes
+
+        Returns:
+            True if all Blender processes exited successfully, False otherwise
+        """
+
+        # With a time budget, all processes render with the same samples so that all frames look alike
+        samples = []
+        if self.scene_config.get("time_budget") is not None:
+            calibrated = self.calibrate_samples(frame_processes)
+            if calibrated is None:
+                return False
+            samples = ["--samples", str(calibrated)]
+
+        # Blender's output is only kept for errors, in files so that no process blocks on a full pipe
+        errors = [tempfile.TemporaryFile(mode="w+") for _ in range(frame_processes)]
+        processes = [
+            subprocess.Popen(
+                [
+                    "blender",
+                    "--background",
+                    "--python",
+                    "cyclist/scene/renderer.py",
+                    "--",
+                    "--scene_config",
+                    self.scene_config_file_path,
+                    "--frame_chunk",
+                    str(chunk_index),
+                    str(frame_processes),
+                ]
+                + samples,
+                stdout=subprocess.DEVNULL,
+                stderr=errors[chunk_index],
+                text=True,
+            )
+            for chunk_index in range(frame_processes)
+        ]
+
+        success = True
+        for process, error in zip(processes, errors):
+            success &= process.wait() == 0
+            error.seek(0)
+            stderr = error.read()
+            if stderr:
+                print(stderr)
+            error.close()
+
+        return success
+
+    def calibrate_samples(self, frame_processes: int) -> int | None:
+        """Calibrates the samples per frame fitting into the time budget once for all processes rendering frames.
+
+        Args:
+            frame_processes: The number of Blender processes, the samples being calibrated for the largest chunk
+
+        Returns:
+            The number of samples, or None if Blender failed
+        """
+
+        completed = subprocess.run(
+            [
+                "blender",
+                "--background",
+                "--python",
+                "cyclist/scene/renderer.py",
+                "--",
+                "--scene_config",
+                self.scene_config_file_path,
+                "--frame_chunk",
+                "0",
+                str(frame_processes),
+                "--calibrate",
+            ],
+            capture_output=True,
+            text=True,
+        )
+        for line in completed.stdout.splitlines():
+            if line.startswith(f"{CALIBRATED} "):
+                return int(line.split()[1])
+
+        print(completed.stderr)
+
+        return None
+
+    def label(self) -> None:
+        """Labels spatial relations and regions and writes the final scene configuration."""
 
         # Create spatial labels (behind, left, right, in front of) and write back to disk
         self.assign_spatial_relations()
@@ -97,78 +294,297 @@ class CycliST:
         self.assign_region_labels()
 
         # Write final scene config to disk
-        with open(scene_config_file_path, "w") as scene_config_file:
-            json.dump(self.scene_config, scene_config_file, indent=2)
+        with open(self.scene_config_file_path, "w") as scene_config_file:
+            json.dump(serialize_scene_config(self.scene_config), scene_config_file, indent=2)
+
+    def compute_spatial_relations(self) -> dict[str, np.ndarray]:
+        """Computes spatial relations (left, right, behind, front of) for all object pairs and frames.
+
+        Returns:
+            For each relation a boolean array of shape (frames, objects, objects) where
+            entry (frame, i, j) states that object j is, e.g., left of object i in that frame
+        """
+
+        objects = self.scene_config["objects"]
+        number_of_frames = int(self.scene_config["fps"] * self.scene_config["duration"])
+
+        # We do not assign relationships for above and below in CycliST
+        names = [
+            name
+            for name in self.scene_config["directions"].keys()
+            if name != "above" and name != "below"
+        ]
+        directions = np.array(
+            [self.scene_config["directions"][name][:2] for name in names]
+        )
 
-        return True
+        # Objects with the same period form groups, whose relations repeat with the least common multiple of both periods
+        periods = get_location_periods(objects, number_of_frames)
+        groups = [np.nonzero(periods == period)[0] for period in np.unique(periods)]
+        locations = get_locations(objects, int(np.lcm.reduce(periods, initial=1)))
+
+        relations = np.zeros((len(names), number_of_frames, len(objects), len(objects)), dtype=bool)
+        for first in groups:
+            for second in groups:
+                hyperperiod = int(np.lcm(periods[first[0]], periods[second[0]]))
+
+                # Normalized displacement from object i to object j for every frame of the hyperperiod and pair
+                differences = locations[:hyperperiod, None, second, :] - locations[:hyperperiod, first, None, :]
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    differences /= np.linalg.norm(differences, axis=-1, keepdims=True)
+
+                # Dot products against all directions at once, repeated over the whole video
+                dot_products = np.einsum("fijd,rd->rfij", differences, directions)
+                relations[:, :, first[:, None], second[None, :]] = tile_frames(
+                    dot_products > self.scene_config["relationship_threshold"], number_of_frames, axis=1
+                )
+
+        # Never relate an object to itself
+        relations &= ~np.eye(len(objects), dtype=bool)
+
+        return dict(zip(names, relations))
 
     def assign_spatial_relations(self):
         """Assign spatial labels (left, right, behind, front of) for each object pair."""
 
+        relations = self.compute_spatial_relations()
+
+        # We store for each relationship separate dictionaries
+        # Each is stored as pair with the first being, e.g., left of, the second
         self.scene_config["relationships"] = {}
-        for name, direction in self.scene_config["directions"].items():
-            # We store for each relationship separate dictionaries
+        for name in self.scene_config["directions"].keys():
             self.scene_config["relationships"][name] = {}
+            if name not in relations.keys():
+                continue
 
-            # We do not assign relationships for above and below in CycliST
-            if name == "above" or name == "below":
+            # Compact alternative storing for each related pair the frame intervals it holds in
+            if self.scene_config.get("relationship_encoding") == "intervals":
+                self.scene_config["relationships"][name] = encode_intervals(relations[name])
                 continue
 
-            # Iterate over frames and get for each the relationships
-            # Each is stored as pair with the first being, e.g., left of, the second
-            for frame in range(
-                int(self.scene_config["fps"] * self.scene_config["duration"])
-            ):
-                self.scene_config["relationships"][name][frame] = []
-                objects = get_frame(frame, self.scene_config["objects"])
-
-                for i in range(len(objects)):
-                    for j in range(len(objects)):
-                        if i == j:
-                            continue
-
-                        difference = np.array(
-                            [
-                                objects[j]["location"]["x"]
-                                - objects[i]["location"]["x"],
-                                objects[j]["location"]["y"]
-                                - objects[i]["location"]["y"],
-                            ]
-                        )
-                        difference /= np.linalg.norm(difference)
-
-                        dot_product = (
-                            difference[0] * direction[0] + difference[1] * direction[1]
-                        )
-
-                        if dot_product > self.scene_config["relationship_threshold"]:
-                            self.scene_config["relationships"][name][frame].append(
-                                (i, j)
-                            )
+            for frame, pairs in enumerate(relations[name]):
+                self.scene_config["relationships"][name][frame] = [
+                    (int(i), int(j)) for i, j in zip(*np.nonzero(pairs))
+                ]
 
     def assign_region_labels(self) -> None:
         """Assigns for each object if it stays within the scenes main region."""
 
-        # Assume that each object is within the scenes boundaries per default
-        for obj in self.scene_config["objects"]:
-            obj["always_within_boundaries"] = True
+        # Each object's location repeats after its period, which is at most the longest one
+        periods = get_location_periods(
+            self.scene_config["objects"],
+            int(self.scene_config["fps"] * self.scene_config["duration"]),
+        )
+        locations = get_locations(self.scene_config["objects"], int(np.max(periods, initial=1)))
+
+        # Check for all frames at once if the boundaries have been crossed
+        within_boundaries = np.all(
+            (locations[..., 0] >= self.scene_config["min_x"])
+            & (locations[..., 0] <= self.scene_config["max_x"])
+            & (locations[..., 1] >= self.scene_config["min_y"])
+            & (locations[..., 1] <= self.scene_config["max_y"]),
+            axis=0,
+        )
+        for obj, within in zip(self.scene_config["objects"], within_boundaries):
+            obj["always_within_boundaries"] = bool(within)
+
+
+def load_directions(directions_path: str) -> dict[str, list[float]]:
+    """Loads the camera's direction vectors, e.g., to label scenes without rendering them.
+
+    Args:
+        directions_path: Path to a JSON file with the directions or a rendered scene configuration containing them
+
+    Returns:
+        The direction vectors by name (behind, front, left, right, above, below)
+    """
+
+    with open(directions_path, "r") as directions_file:
+        directions = json.load(directions_file)
+
+    return directions.get("directions", directions)
+
+
+def render_scene(scene_config_path: str, persistent_blender: bool | None = None) -> bool:
+    """Renders and labels a scene planned beforehand with plan_only.
+
+    Args:
+        scene_config_path: The path to the pre-rendering scene configuration
+        persistent_blender: Whether to render with the Blender process kept alive, by default as planned
+
+    Returns:
+        True if the scene has been rendered successfully, False otherwise
+    """
+
+    try:
+        with open(scene_config_path, "r") as scene_config_file:
+            scene_config = json.load(scene_config_file)
+
+        # Plans may have been moved, e.g., to another machine
+        scene_config["scene_config_directory"] = os.path.dirname(scene_config_path)
+        scene_config["scene_config_file"] = os.path.basename(scene_config_path)
+        if persistent_blender is not None:
+            scene_config["persistent_blender"] = persistent_blender
+
+        cyclist = CycliST(scene_config=scene_config)
+        cyclist.render()
+        cyclist.label()
+        cyclist.encode()
+
+        return cyclist.scene_config["rendered"]
+    except Exception:
+        traceback.print_exc()
+        return False
+
+
+def process_scenes(
+    function: Callable[[Any], bool],
+    jobs: dict[int | str, Any],
+    workers: int,
+    rtpt: RTPT | None = None,
+) -> list[int | str]:
+    """Processes scenes one after another or in parallel, reporting the progress.
+
+    Args:
+        function: The function processing a single scene, returning True on success
+        jobs: The argument of the function for each scene, identified by its index or name
+        workers: The number of processes, serially in this process if at most 1
+        rtpt: Optionally tracks the progress in the process title
+
+    Returns:
+        The indices or names of the scenes that failed
+    """
+
+    failed = []
+    start = time.time()
+
+    def report(scene_index: int | str, success: bool, finished: int) -> None:
+        if not success:
+            failed.append(scene_index)
+        if rtpt is not None:
+            rtpt.step()
+        print(
+            f"[{finished}/{len(jobs)}] scene {scene_index} "
+            f"{'done' if success else 'failed'} after {time.time() - start:.1f} seconds"
+        )
+
+    if workers <= 1:
+        for finished, (scene_index, job) in enumerate(jobs.items(), start=1):
+            report(scene_index, function(job), finished)
+    else:
+        # Spawn fresh workers instead of forking this process with CUDA initialized
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            futures = {
+                executor.submit(process_and_encode, function, job): scene_index
+                for scene_index, job in jobs.items()
+            }
+
+            for finished, future in enumerate(as_completed(futures), start=1):
+                # A crashed worker process fails its scene rather than the whole run
+                try:
+                    success = future.result()
+                except Exception:
+                    traceback.print_exc()
+                    success = False
+
+                report(futures[future], success, finished)
+
+    print(
+        f"Processed {len(jobs) - len(failed)} of {len(jobs)} scenes "
+        f"in {time.time() - start:.1f} seconds"
+    )
+    if failed:
+        print(f"Failed scenes: {sorted(failed)}")
+
+    return sorted(failed)
+
+
+def process_and_encode(function: Callable[[Any], bool], job: Any) -> bool:
+    """Processes a scene in a worker process and waits for its encoding, whose result would be lost otherwise.
+
+    Args:
+        function: The function processing a single scene, returning True on success
+        job: The argument of the function
+
+    Returns:
+        True if the scene has been processed and encoded successfully, False otherwise
+    """
+
+    success = function(job)
+
+    return len(wait_for_encodings()) == 0 and success
+
+
+def run_scene(scene_config: dict[str, any]) -> bool:
+    """Generates a single scene, including its config, video and labels.
+
+    Used as the unit of work of the process pool, hence defined on module level.
+
+    Args:
+        scene_config: The scene configuration with the scene's index already set
+
+    Returns:
+        True if the scene has been generated successfully, False otherwise
+    """
+
+    try:
+        return CycliST(scene_config=scene_config).run()
+    except Exception:
+        traceback.print_exc()
+        return False
 
-        # Check for each frame if the boundaries have been crossed
-        for frame in range(
-            int(self.scene_config["fps"] * self.scene_config["duration"])
-        ):
-            objects = get_frame(frame, self.scene_config["objects"])
 
-            for index, obj in enumerate(objects):
-                if (
-                    obj["location"]["x"] < self.scene_config["min_x"]
-                    or obj["location"]["x"] > self.scene_config["max_x"]
-                    or obj["location"]["y"] < self.scene_config["min_y"]
-                    or obj["location"]["y"] > self.scene_config["max_y"]
-                ):
-                    self.scene_config["objects"][index][
-                        "always_within_boundaries"
-                    ] = False
+def run_manifest_scene(
+    scene_config: dict[str, any], manifest_path: str, max_attempts: int, lease_timeout: float
+) -> bool:
+    """Generates a single scene if it can be claimed in the manifest, and records the outcome there.
+
+    Args:
+        scene_config: The scene configuration with the scene's index already set
+        manifest_path: The path of the manifest shared by all workers
+        max_attempts: How many times a scene is tried at most
+        lease_timeout: The time in seconds after which a claim that has not been renewed expires
+
+    Returns:
+        True if the scene has been generated successfully or by another worker, False otherwise;
+        failed encodings are reported by wait_for_encodings
+    """
+
+    manifest = Manifest(manifest_path)
+    split, scene_index = scene_config["split"], scene_config["scene_index"]
+    if not manifest.claim(split, scene_index, max_attempts):
+        print(f"Scene {scene_index} has been claimed by another worker")
+        return True
+
+    # Renew the claim until the outcome is recorded, which may only happen once the scene has been encoded
+    heartbeat = manifest.keep_alive(split, scene_index, lease_timeout / 4)
+
+    def record(success: bool) -> None:
+        heartbeat.set()
+        if success:
+            manifest.complete(
+                split, scene_index, cyclist.scene_config.get("render_time"), scene_outputs(cyclist.scene_config)
+            )
+        else:
+            manifest.fail(split, scene_index)
+
+    try:
+        cyclist = CycliST(scene_config=scene_config)
+        success = cyclist.run()
+    except Exception:
+        traceback.print_exc()
+        success = False
+
+    # Outputs are only complete once encoded, which finishes while the next scene is rendered
+    if success and cyclist.encoding is not None:
+        cyclist.encoding.add_done_callback(lambda encoding: record(encoding.exception() is None and encoding.result()))
+    else:
+        record(success)
+
+    return success
 
 
 if __name__ == "__main__":
@@ -176,20 +592,50 @@ if __name__ == "__main__":
     from copy import deepcopy
     from .utility import parse_scene_config
 
-    # Setup CycliST with CLI args
+    # Setup CycliST with CLI args, the number of workers does not belong into the scene files
     scene_config = parse_scene_config()
+    workers = scene_config.pop("workers")
+    manifest_path = scene_config.pop("manifest_path")
+    max_attempts = scene_config.pop("max_attempts")
+    lease_timeout = scene_config.pop("lease_timeout")
 
-    print("render ", scene_config['number_of_videos'], "videos")
+    print("plan " if scene_config["plan_only"] else "render ", scene_config['number_of_videos'], "videos")
     rtpt = RTPT(name_initials='DO', experiment_name='Cyclist render', max_iterations=scene_config['number_of_videos'])
     rtpt.start()
-    import torch
-    t = torch.tensor([0])
-    t.to("cuda")
+    if not scene_config["plan_only"]:
+        import torch
+        t = torch.tensor([0])
+        t.to("cuda")
 
-    # Render all the scenes
+    # Each scene gets its own index, the scene's random state only depends on seed and index
+    jobs = {}
     for scene_index in range(scene_config["number_of_videos"]):
-        # Each scene gets its own index
         scene_config["scene_index"] = scene_index + scene_config["scene_index_offset"]
+        jobs[scene_config["scene_index"]] = deepcopy(scene_config)
+
+    # Only generate scenes that have neither been completed nor failed too often, claiming each in the manifest
+    function = run_scene
+    if manifest_path is not None:
+        manifest = Manifest(manifest_path)
+        manifest.add(scene_config["split"], jobs.keys(), fingerprint(scene_config))
+        manifest.release(scene_config["split"], lease_timeout)
+        manifest.verify(scene_config["split"])
+        pending = manifest.pending(scene_config["split"], max_attempts)
+        print(f"Skipping {len(jobs) - len(pending)} scenes completed before or out of attempts")
+
+        jobs = {scene_index: jobs[scene_index] for scene_index in pending}
+        function = partial(
+            run_manifest_scene, manifest_path=manifest_path, max_attempts=max_attempts, lease_timeout=lease_timeout
+        )
 
-        # Generate the scene, including its config, video and questions
-        CycliST(scene_config=deepcopy(scene_config)).run()
+    # Generate the scenes, including their config, video and labels
+    failed = process_scenes(function, jobs, workers, rtpt)
+    get_render_worker().close()
+    failed_encodings = wait_for_encodings()
+    if failed_encodings:
+        print(f"Failed to encode: {sorted(failed_encodings)}")
+    if manifest_path is not None:
+        print(f"Manifest of {scene_config['split']}: {manifest.summary(scene_config['split'])}")
+
+    if failed or failed_encodings:
+        sys.exit(1)
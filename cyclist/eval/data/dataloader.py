@@ -1,12 +1,13 @@
 import json
 from pathlib import Path
 from torch.utils.data import Dataset
-from cyclist.eval.data.load_vid import read_video_pyav
+from cyclist.eval.data.load_vid import load_frame_tensor, read_video_pyav
 
 
 class CyListVQADataset(Dataset):
-    def __init__(self, data_path, question_file="cycliST_questions.json", FPS=32, SAMPLED_FRAMES_PER_SEC=8, return_file_path=False):
+    def __init__(self, data_path, question_file="cycliST_questions.json", FPS=32, SAMPLED_FRAMES_PER_SEC=8, return_file_path=False, tensor_path=None):
         self.data_path = data_path
+        self.tensor_path = tensor_path
         self.FRAMES_PER_SEC = FPS
         self.SAMPLED_FRAMES_PER_SEC = SAMPLED_FRAMES_PER_SEC
         self.return_file_path = return_file_path
@@ -18,6 +19,15 @@ class CyListVQADataset(Dataset):
     def __len__(self):
         return len(self.questions)
 
+    def load_video(self, video_path):
+        # Frames sampled at render time are memory-mapped instead of decoding the video
+        if self.tensor_path is not None:
+            video_clip, video_time, frame_times = load_frame_tensor(self.tensor_path, video_path.name, self.FRAMES_PER_SEC, self.SAMPLED_FRAMES_PER_SEC)
+            if video_clip is not None:
+                return video_clip, video_time, frame_times
+
+        return read_video_pyav(video_path, self.FRAMES_PER_SEC, self.SAMPLED_FRAMES_PER_SEC)
+
     def __getitem__(self, idx):
         q = self.questions[idx]
         video_path = Path(self.data_path, q['video_filename'])
@@ -25,7 +35,7 @@ class CyListVQADataset(Dataset):
         if self.return_file_path:
             return str(video_path), q['question'], str(q['answer']), [], []
 
-        video_clip, video_time, frame_times = read_video_pyav(video_path, self.FRAMES_PER_SEC, self.SAMPLED_FRAMES_PER_SEC)
+        video_clip, video_time, frame_times = self.load_video(video_path)
 
         if video_clip.shape[0] != self.expected_frames:
             print(f"Warning: {video_path} has {video_clip.shape[0]} frames, expected {self.expected_frames}.")
@@ -33,8 +43,9 @@ class CyListVQADataset(Dataset):
 
 
 class CyListSceneUnderstandingDataset(Dataset):
-    def __init__(self, data_path, scene_file, FPS=32, SAMPLED_FRAMES_PER_SEC=8, return_file_path=False):
+    def __init__(self, data_path, scene_file, FPS=32, SAMPLED_FRAMES_PER_SEC=8, return_file_path=False, tensor_path=None):
         self.data_path = data_path
+        self.tensor_path = tensor_path
         self.FRAMES_PER_SEC = FPS
         self.SAMPLED_FRAMES_PER_SEC = SAMPLED_FRAMES_PER_SEC
         self.return_file_path = return_file_path
@@ -48,6 +59,15 @@ class CyListSceneUnderstandingDataset(Dataset):
     def __len__(self):
         return len(self.scenes)
 
+    def load_video(self, video_path):
+        # Frames sampled at render time are memory-mapped instead of decoding the video
+        if self.tensor_path is not None:
+            video_clip, video_time, frame_times = load_frame_tensor(self.tensor_path, video_path.name, self.FRAMES_PER_SEC, self.SAMPLED_FRAMES_PER_SEC)
+            if video_clip is not None:
+                return video_clip, video_time, frame_times
+
+        return read_video_pyav(video_path, self.FRAMES_PER_SEC, self.SAMPLED_FRAMES_PER_SEC)
+
     def __getitem__(self, idx):
         file_path, scene_idx = self.scene_dict[idx]
         video_path = Path(self.data_path, file_path)
@@ -55,7 +75,7 @@ class CyListSceneUnderstandingDataset(Dataset):
         if self.return_file_path:
             return str(video_path), [], [], scene_idx
 
-        video_clip, video_time, frame_times = read_video_pyav(video_path, self.FRAMES_PER_SEC, self.SAMPLED_FRAMES_PER_SEC)
+        video_clip, video_time, frame_times = self.load_video(video_path)
 
         if video_clip.shape[0] != self.expected_frames:
             print(f"Warning: {video_path} has {video_clip.shape[0]} frames, expected {self.expected_frames}.")
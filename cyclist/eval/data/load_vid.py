@@ -1,3 +1,6 @@
+from pathlib import Path
+import json
+
 import av
 import numpy as np
 
@@ -51,3 +54,33 @@ def read_video_pyav(vid_path, FPS=32, SAMPLED_FRAMES_PER_SEC=8):
             frame_times.append(round(float(frame_time), 2))
 
     return np.stack(frames), num_seconds, frame_times
+
+
+def load_frame_tensor(tensor_path, vid_file, FPS=32, SAMPLED_FRAMES_PER_SEC=8):
+    '''
+    Load the sampled frames of a video written at render time (--tensor_fps) without decoding it.
+
+    Args:
+        tensor_path (str): Path to the directory with the frame arrays.
+        vid_file (str): File name of the video, e.g. 'train_0.mp4'.
+        FPS (int): Native frame rate of the video, if not stored with the frames.
+        SAMPLED_FRAMES_PER_SEC (int): Number of frames to sample per second.
+
+    Returns:
+        np.ndarray: Memory-mapped frames of shape (num_frames, height, width, 3), or None if they have not been written.
+        float: Video duration in seconds.
+        list: Timestamps of sampled frames in seconds.
+    '''
+    name = Path(vid_file).stem
+    frames_path = Path(tensor_path, f"{name}_{SAMPLED_FRAMES_PER_SEC}fps.npy")
+    metadata_path = Path(tensor_path, f"{name}_{SAMPLED_FRAMES_PER_SEC}fps.json")
+    if not frames_path.exists() or not metadata_path.exists():
+        return None, None, None
+
+    frames = np.load(frames_path, mmap_mode="r")
+    frame_times = np.load(Path(tensor_path, f"{name}_{SAMPLED_FRAMES_PER_SEC}fps_times.npy")).tolist()
+    with open(metadata_path, "r") as metadata_file:
+        metadata = json.load(metadata_file)
+
+    # Duration of the video the frames have been sampled from
+    return frames, metadata["number_of_frames"] / metadata.get("fps", FPS), frame_times
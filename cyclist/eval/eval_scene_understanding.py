@@ -22,6 +22,8 @@ parser.add_argument('--scene_path', type=str, required=True,
     help="Path to the scene JSON file.")
 parser.add_argument('--captions_path', type=str, required=True,
     help="Path to save the generated captions.")
+parser.add_argument('--tensor_path', type=str, default=None,
+    help="Path to the frame arrays written at render time (--tensor_fps), used instead of decoding the videos if present.")
 parser.add_argument('--experiment_name', type=str, default="train")
 parser.add_argument('--verbose', action='store_true', default=False)
 
@@ -37,7 +39,8 @@ def eval_scene_understanding(args):
     return_file_path = isinstance(model_wrapper, GeminiAPIWrapper)
     cyc_dataset = CyListSceneUnderstandingDataset(args.data_path, args.scene_path,
                                                   FPS=32, SAMPLED_FRAMES_PER_SEC=args.SAMPLED_FRAMES_PER_SEC,
-                                                  return_file_path=return_file_path)
+                                                  return_file_path=return_file_path,
+                                                  tensor_path=args.tensor_path)
     cyc_dataloader = DataLoader(cyc_dataset, batch_size=1, shuffle=True, num_workers=0)
 
     if args.verbose and not return_file_path:
@@ -22,6 +22,8 @@ parser.add_argument('--answer_path', type=str, required=True,
     help="Path to save the generated answers.")
 parser.add_argument('--question_file', type=str, required=True,
     help="JSON file containing all questions.")
+parser.add_argument('--tensor_path', type=str, default=None,
+    help="Path to the frame arrays written at render time (--tensor_fps), used instead of decoding the videos if present.")
 parser.add_argument('--experiment_name', type=str, default="train")
 parser.add_argument('--verbose', action='store_true', default=False)
 
@@ -37,7 +39,8 @@ def eval_vqa(args):
     return_file_path = isinstance(model_wrapper, GeminiAPIWrapper)
     cyc_dataset = CyListVQADataset(args.data_path, args.question_file,
                                    FPS=32, SAMPLED_FRAMES_PER_SEC=args.SAMPLED_FRAMES_PER_SEC,
-                                   return_file_path=return_file_path)
+                                   return_file_path=return_file_path,
+                                   tensor_path=args.tensor_path)
     batch_size = 2 if args.SAMPLED_FRAMES_PER_SEC > 16 else 4
     cyc_dataloader = DataLoader(cyc_dataset, batch_size=batch_size, shuffle=True, num_workers=0)
 
@@ -0,0 +1,375 @@
+"""This file contains the Manifest, a job queue of a dataset's scenes shared by all processes and machines rendering it."""
+
+# Standard Library
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+# Statuses of a job, scenes that are neither completed nor running are claimed by the next worker
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# Arguments selecting which scenes are generated and how, which do not change the outputs of a scene
+# The seed is chosen randomly unless given, and scenes of an earlier run are just as valid
+UNFINGERPRINTED = (
+    "seed",
+    "scene_index",
+    "scene_index_offset",
+    "number_of_videos",
+    "device",
+    "persistent_blender",
+    "frame_processes",
+    "render_threads",
+    "encode_workers",
+)
+
+
+def checksum(path: str) -> str:
+    """Computes the SHA-256 checksum of a file.
+
+    Args:
+        path: The path of the file
+
+    Returns:
+        The hexadecimal digest
+    """
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def fingerprint(scene_config: dict[str, Any]) -> str:
+    """Identifies the arguments a scene is generated from, so that changing them requires generating it again.
+
+    Args:
+        scene_config: The scene configuration before generating the scene
+
+    Returns:
+        The hexadecimal SHA-256 digest of the configuration apart from arguments in UNFINGERPRINTED
+    """
+
+    arguments = {key: value for key, value in scene_config.items() if key not in UNFINGERPRINTED}
+
+    return hashlib.sha256(json.dumps(arguments, sort_keys=True).encode()).hexdigest()
+
+
+def scene_outputs(scene_config: dict[str, Any]) -> list[str]:
+    """Lists the files written for a generated scene.
+
+    Args:
+        scene_config: The configuration of the generated scene
+
+    Returns:
+        The paths of the scene configuration and, if rendered, of its videos and frame tensors
+    """
+
+    outputs = [os.path.join(scene_config["scene_config_directory"], scene_config["scene_config_file"])]
+    if scene_config["rendered"]:
+        outputs.append(os.path.join(scene_config["video_directory"], scene_config["video_file"]))
+        for video_file in scene_config.get("video_variants", {}).values():
+            outputs.append(os.path.join(scene_config["video_directory"], video_file))
+        for files in scene_config.get("frame_tensors", {}).values():
+            outputs.extend(os.path.join(scene_config["tensor_directory"], file) for file in files.values())
+
+    return outputs
+
+
+class Manifest:
+    """Keeps one record per scene of a dataset in an SQLite database, with its status, attempts, render time and output checksums.
+
+    Workers claim scenes atomically, so any number of processes, also on multiple machines sharing a
+    filesystem, can work through the same scenes. Claims are leases renewed while a scene is worked on.
+    Restarts skip completed scenes whose outputs are unchanged and retry failed ones and expired claims.
+
+    Args:
+        path: The path of the database, created if it does not exist
+    """
+
+    def __init__(self, path: str) -> "Manifest":
+        self.path = path
+
+        with self.connect() as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    split TEXT NOT NULL,
+                    scene_index INTEGER NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    claimed_at REAL,
+                    render_time REAL,
+                    checksums TEXT,
+                    PRIMARY KEY (split, scene_index)
+                )
+                """
+            )
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        """Opens a connection in autocommit mode, waiting for other workers holding the database's lock.
+
+        Yields:
+            The connection to the database, closed afterwards
+        """
+
+        connection = sqlite3.connect(self.path, timeout=60.0, isolation_level=None)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def worker() -> str:
+        """Identifies the current process.
+
+        Returns:
+            The host name and process id
+        """
+
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def add(self, split: str, scene_indices: Iterable[int], fingerprint: str) -> None:
+        """Adds scenes as pending, or resets scenes that were generated from other arguments.
+
+        Args:
+            split: The name of the dataset split
+            scene_indices: The indices of the scenes
+            fingerprint: The fingerprint of the arguments the scenes are generated from
+        """
+
+        with self.connect() as connection:
+            connection.executemany(
+                """
+                INSERT INTO jobs (split, scene_index, fingerprint, status) VALUES (?, ?, ?, ?)
+                ON CONFLICT (split, scene_index) DO UPDATE SET
+                    fingerprint = excluded.fingerprint,
+                    status = excluded.status,
+                    attempts = 0,
+                    render_time = NULL,
+                    checksums = NULL
+                WHERE fingerprint != excluded.fingerprint
+                """,
+                [(split, scene_index, fingerprint, PENDING) for scene_index in scene_indices],
+            )
+
+    def release(self, split: str, lease_timeout: float) -> None:
+        """Marks scenes as failed whose worker has exited without finishing them, e.g., after a crash.
+
+        Workers on this machine are checked directly. Workers on other machines, or on this machine under a
+        former host name, are considered gone once they have not renewed their claim within the lease timeout.
+
+        Args:
+            split: The name of the dataset split
+            lease_timeout: The time in seconds after its last renewal that a claim expires on any machine
+        """
+
+        host = socket.gethostname()
+        expired = time.time() - lease_timeout
+        with self.connect() as connection:
+            running = connection.execute(
+                "SELECT scene_index, worker, claimed_at FROM jobs WHERE split = ? AND status = ?",
+                (split, RUNNING),
+            ).fetchall()
+
+            for scene_index, worker, claimed_at in running:
+                worker_host, pid = worker.rsplit(":", 1)
+                crashed = worker_host == host and not pid_exists(int(pid))
+                if not crashed and claimed_at >= expired:
+                    continue
+
+                connection.execute(
+                    "UPDATE jobs SET status = ? WHERE split = ? AND scene_index = ? AND worker = ? AND claimed_at = ?",
+                    (FAILED, split, scene_index, worker, claimed_at),
+                )
+
+    def keep_alive(self, split: str, scene_index: int, interval: float) -> threading.Event:
+        """Renews the claim of the current process on a scene in a background thread, so that its lease does not expire.
+
+        Args:
+            split: The name of the dataset split
+            scene_index: The index of the scene
+            interval: The time in seconds between renewals
+
+        Returns:
+            The event to set once the scene has been recorded, which stops renewing the claim
+        """
+
+        stopped = threading.Event()
+        worker = self.worker()
+
+        def renew() -> None:
+            while not stopped.wait(interval):
+                try:
+                    with self.connect() as connection:
+                        connection.execute(
+                            """
+                            UPDATE jobs SET claimed_at = ?
+                            WHERE split = ? AND scene_index = ? AND status = ? AND worker = ?
+                            """,
+                            (time.time(), split, scene_index, RUNNING, worker),
+                        )
+                except sqlite3.Error as error:
+                    print(f"Failed to renew the claim on scene {scene_index}: {error}")
+
+        threading.Thread(target=renew, daemon=True).start()
+
+        return stopped
+
+    def verify(self, split: str) -> None:
+        """Sets completed scenes back to pending if any of their outputs is missing now or was when completed, or has changed.
+
+        Args:
+            split: The name of the dataset split
+        """
+
+        with self.connect() as connection:
+            completed = connection.execute(
+                "SELECT scene_index, checksums FROM jobs WHERE split = ? AND status = ?",
+                (split, COMPLETED),
+            ).fetchall()
+
+            for scene_index, checksums in completed:
+                if all(
+                    digest is not None and os.path.exists(path) and checksum(path) == digest
+                    for path, digest in json.loads(checksums).items()
+                ):
+                    continue
+
+                connection.execute(
+                    "UPDATE jobs SET status = ?, attempts = 0 WHERE split = ? AND scene_index = ?",
+                    (PENDING, split, scene_index),
+                )
+
+    def pending(self, split: str, max_attempts: int) -> list[int]:
+        """Lists the scenes that are yet to be generated.
+
+        Args:
+            split: The name of the dataset split
+            max_attempts: How many times a scene is tried at most
+
+        Returns:
+            The indices of the pending scenes and failed scenes with attempts left
+        """
+
+        with self.connect() as connection:
+            rows = connection.execute(
+                """
+                SELECT scene_index FROM jobs
+                WHERE split = ? AND status IN (?, ?) AND attempts < ?
+                ORDER BY scene_index
+                """,
+                (split, PENDING, FAILED, max_attempts),
+            ).fetchall()
+
+        return [scene_index for (scene_index,) in rows]
+
+    def claim(self, split: str, scene_index: int, max_attempts: int) -> bool:
+        """Claims a scene for the current process, unless another worker has claimed or completed it.
+
+        Args:
+            split: The name of the dataset split
+            scene_index: The index of the scene
+            max_attempts: How many times a scene is tried at most
+
+        Returns:
+            True if the scene has been claimed, False otherwise
+        """
+
+        # A single UPDATE is atomic, so only one worker can claim the scene
+        with self.connect() as connection:
+            cursor = connection.execute(
+                """
+                UPDATE jobs SET status = ?, attempts = attempts + 1, worker = ?, claimed_at = ?
+                WHERE split = ? AND scene_index = ? AND status IN (?, ?) AND attempts < ?
+                """,
+                (RUNNING, self.worker(), time.time(), split, scene_index, PENDING, FAILED, max_attempts),
+            )
+
+        return cursor.rowcount == 1
+
+    def complete(self, split: str, scene_index: int, render_time: float | None, outputs: list[str]) -> None:
+        """Marks a scene claimed by the current process as completed and records the checksums of its outputs.
+
+        Args:
+            split: The name of the dataset split
+            scene_index: The index of the scene
+            render_time: The time rendering the scene took in seconds, None if it has not been rendered
+            outputs: The paths of the files expected for the scene, where missing ones are recorded without
+                checksum so that verify generates the scene again
+        """
+
+        checksums = {path: checksum(path) if os.path.exists(path) else None for path in outputs}
+        with self.connect() as connection:
+            connection.execute(
+                """
+                UPDATE jobs SET status = ?, render_time = ?, checksums = ?
+                WHERE split = ? AND scene_index = ? AND status = ? AND worker = ?
+                """,
+                (COMPLETED, render_time, json.dumps(checksums), split, scene_index, RUNNING, self.worker()),
+            )
+
+    def fail(self, split: str, scene_index: int) -> None:
+        """Marks a scene claimed by the current process as failed, so that it is retried if it has attempts left.
+
+        Args:
+            split: The name of the dataset split
+            scene_index: The index of the scene
+        """
+
+        with self.connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ? WHERE split = ? AND scene_index = ? AND status = ? AND worker = ?",
+                (FAILED, split, scene_index, RUNNING, self.worker()),
+            )
+
+    def summary(self, split: str) -> dict[str, int]:
+        """Counts the scenes of a split by status.
+
+        Args:
+            split: The name of the dataset split
+
+        Returns:
+            The number of scenes for each status
+        """
+
+        with self.connect() as connection:
+            rows = connection.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE split = ? GROUP BY status",
+                (split,),
+            ).fetchall()
+
+        return dict(rows)
+
+
+def pid_exists(pid: int) -> bool:
+    """Checks if a process is running on this machine.
+
+    Args:
+        pid: The process id
+
+    Returns:
+        True if the process exists, False otherwise
+    """
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
@@ -14,6 +14,7 @@ from operator import itemgetter
 import datetime
 from pathlib import Path
 import question_engine as qeng
+from cyclist.utility import expand_relationships
 
 """
 Generate synthetic questions and answers for CLEVR images. Input is a single
@@ -303,16 +304,21 @@ def find_relate_filter_options_temporal(object_idx, scene_struct, metadata,
     # is empty or where the intersection is equal to the filtering output.
     trivial_options = {}
 
+    # interval encoded relationships are expanded once on demand and cached like the filter options
+    if '_relationship_frames' not in scene_struct:
+        scene_struct['_relationship_frames'] = expand_relationships(scene_struct)
+    relationships = scene_struct['_relationship_frames']
+
     # for frame, relationships in enumerate(scene_struct['relationships_seq']):
         # for relationship in relationships:
-    for relation in scene_struct['relationships']:
-        for frame_key in scene_struct['relationships'][relation]:
+    for relation in relationships:
+        for frame_key in relationships[relation]:
             related = set()
 
         # related = set(relationships[relationship][object_idx])
         related = set()
         # Collect related objects for the current frame
-        for entry in scene_struct['relationships'][relation][frame_key]:
+        for entry in relationships[relation][frame_key]:
             if entry[0] == object_idx:
                 related.add(entry[1])
 
@@ -6,10 +6,9 @@ def equal_handler(scene_struct, inputs, side_inputs):
 
 
 def obtain_destination_color(obj):
-    # the first color in the cycle state should match the initial color
-    assert(obj['cycles']['recolor']['states'][0]['color'] == obj['color'])
-    # the second is the color it transitions into
-    return obj['cycles']['recolor']['states'][1]['color']
+    # the color it transitions into is a parameter of the recolor cycle
+    assert 'recolor' in obj['cycles']
+    return obj['intermittent_color']
 
 
 # 
@@ -55,7 +55,7 @@ def query_color_final(scene_struct, inputs, side_inputs):
     idx = inputs[0]
     obj = scene_struct['objects'][idx]
     if 'cycles' in obj and 'recolor' in obj['cycles']:
-        return obj['cycles']['recolor']['states'][1]['color']
+        return obj['intermittent_color']
     else:
         return '__INVALID__'
 
@@ -66,10 +66,7 @@ def query_size_final(scene_struct, inputs, side_inputs):
     idx = inputs[0]
     obj = scene_struct['objects'][idx]
     if 'cycles' in obj and 'resize' in obj['cycles']:
-        if obj['cycles']['resize']['states'][1]['factor'] < 1:
-            return "small"
-        else:
-            return "large"
+        return obj['intermittent_size']
     else:
         return '__INVALID__'
 
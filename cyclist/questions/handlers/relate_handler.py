@@ -26,6 +26,13 @@ def relate_existential_handler(scene_struct, inputs, side_inputs):
     result = set()
     
     if 'relationships' in scene_struct: #TODO why is this necessary?
+        # interval encoding: [i, j, [[start, end], ...]] is only stored if the pair is related at least once
+        if isinstance(scene_struct['relationships'][relation], list):
+            for i, j, intervals in scene_struct['relationships'][relation]:
+                if j == inputs[0] and intervals:
+                    result.add(i)
+            return list(result)
+
         for frame in scene_struct['relationships'][relation]:
             for object_tuple in scene_struct['relationships'][relation][frame]:
                 if object_tuple[1] == inputs[0]:
@@ -45,6 +52,15 @@ def relate_universal_handler(scene_struct, inputs, side_inputs):
     result = set(list(range(0, len(scene_struct['objects']))))
 
     if 'relationships' in scene_struct: #TODO why is this necessary?
+        # interval encoding: the pair has to be related in a single interval spanning all frames
+        if isinstance(scene_struct['relationships'][relation], list):
+            num_frames = int(scene_struct['fps'] * scene_struct['duration'])
+            result = set()
+            for i, j, intervals in scene_struct['relationships'][relation]:
+                if j == inputs[0] and intervals == [[0, num_frames]]:
+                    result.add(i)
+            return list(result)
+
         for frame in scene_struct['relationships'][relation]:
             intermediate_set = set()
             for object_tuple in scene_struct['relationships'][relation][frame]:
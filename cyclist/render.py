@@ -0,0 +1,94 @@
+"""Renders scene plans written beforehand with 'python -m cyclist.cyclist --plan_only'."""
+
+# Standard Library
+from functools import partial
+import argparse
+import glob
+import json
+import os
+import sys
+
+# Third Party
+from rtpt import RTPT
+
+# CycliST
+from .cyclist import process_scenes, render_scene
+from .scene.encoder import wait_for_encodings
+from .scene.worker import get_render_worker
+
+
+def find_plans(paths: list[str], rerender: bool = False) -> dict[str, str]:
+    """Finds the scene configurations to render.
+
+    Args:
+        paths: Scene configuration files or directories containing them
+        rerender: Whether to also include scenes that have already been rendered
+
+    Returns:
+        The path of the scene configuration for each scene, identified by its file name
+    """
+
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*_config.json"))))
+        else:
+            files.append(path)
+
+    plans = {}
+    for file in files:
+        with open(file, "r") as scene_config_file:
+            scene_config = json.load(scene_config_file)
+
+        if scene_config["rendered"] and not rerender:
+            continue
+        plans[os.path.basename(file)] = file
+
+    return plans
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render CycliST scene plans.")
+    parser.add_argument(
+        "plans",
+        nargs="+",
+        type=str,
+        help="Scene configuration files or directories containing them.",
+    )
+    parser.add_argument(
+        "--workers",
+        default=1,
+        type=int,
+        help="The number of processes rendering scenes in parallel, each running its own Blender.",
+    )
+    parser.add_argument(
+        "--persistent_blender",
+        action='store_true',
+        help="Whether to keep Blender running across scenes, loading the base scene and materials only once.",
+    )
+    parser.add_argument(
+        "--rerender",
+        action='store_true',
+        help="Whether to also render scenes that have already been rendered.",
+    )
+    args = parser.parse_args()
+
+    plans = find_plans(args.plans, args.rerender)
+    print("render ", len(plans), "videos")
+    rtpt = RTPT(name_initials='DO', experiment_name='Cyclist render', max_iterations=len(plans))
+    rtpt.start()
+
+    # Only override how plans are rendered if asked to
+    failed = process_scenes(
+        partial(render_scene, persistent_blender=args.persistent_blender or None),
+        plans,
+        args.workers,
+        rtpt,
+    )
+    get_render_worker().close()
+    failed_encodings = wait_for_encodings()
+    if failed_encodings:
+        print(f"Failed to encode: {sorted(failed_encodings)}")
+
+    if failed or failed_encodings:
+        sys.exit(1)
@@ -12,6 +12,9 @@ class Cycle:
     def __init__(self, scene_config: dict[str, Any]) -> "Cycle":
         self.scene_config = scene_config
 
+        # Optional PlacementSampler to draw locations from free space only
+        self.sampler = None
+
     @staticmethod
     def prime_factors(n: int) -> list[int]:
         """Computes the prime factors of a number.
@@ -39,9 +42,12 @@ class Cycle:
 
         return primes
 
-    def choose_period(self) -> int:
+    def choose_period(self, rng: np.random.Generator) -> int:
         """Chooses a cycle period from random  prime factors of the total number of frames.
 
+        Args:
+            rng: The random number generator to draw from
+
         Returns:
             The cycle period in frames (number of frames until object is back in original state)
         """
@@ -49,9 +55,9 @@ class Cycle:
         primes = self.prime_factors(
             self.scene_config["fps"] * self.scene_config["duration"]
         )
-        factors = np.random.choice(
+        factors = rng.choice(
             primes,
-            size=np.random.randint(
+            size=rng.integers(
                 self.scene_config["min_number_of_prime_factors"],
                 self.scene_config["max_number_of_prime_factors"] + 1,
             ),
@@ -60,155 +66,93 @@ class Cycle:
 
         return int(np.prod(factors))
 
-    def apply_orbit(self, object_config: dict[str, Any]):
+    def sample_location(self, object_config: dict[str, Any], rng: np.random.Generator) -> dict[str, float]:
+        """Samples a random location within the scene's boundaries.
+
+        Args:
+            object_config: The object to sample a location for
+            rng: The random number generator to draw from
+
+        Returns:
+            The location, drawn from free space only if a sampler is set and any free space is left
+        """
+
+        location = self.sampler.sample(rng) if self.sampler is not None else None
+        if location is None:
+            location = (
+                rng.uniform(self.scene_config["min_x"], self.scene_config["max_x"]),
+                rng.uniform(self.scene_config["min_y"], self.scene_config["max_y"]),
+            )
+
+        return {
+            "x": float(location[0]),
+            "y": float(location[1]),
+            "z": self.scene_config["sizes"][object_config["size"]],
+        }
+
+    def apply_orbit(self, object_config: dict[str, Any], rng: np.random.Generator):
         assert (
             "objects" in self.scene_config.keys()
             and len(self.scene_config["objects"]) > 0
         ), "Orbiting objects require already existing objects in the scene."
 
         # Get cycle period in frames
-        period = self.choose_period()
+        period = self.choose_period(rng)
 
         # Initial angle and its increment (randomly chosen clockwise or counter clockwise)
-        initial_angle = np.random.uniform(0, 2.0 * np.pi)
-        angle_increment = np.random.choice([-1.0, 1.0]) * 2.0 * np.pi / period
+        initial_angle = rng.uniform(0, 2.0 * np.pi)
+        angle_increment = rng.choice([-1.0, 1.0]) * 2.0 * np.pi / period
 
         # Store information about orbit direction
         object_config["orbit_direction"] = "clockwise" if angle_increment < 0.0 else "counterclockwise"
 
-        # Select random object as center of orbit
-        object_config["center"] = int(
-            np.random.choice(range(len(self.scene_config["objects"])))
-        )
-        center = self.scene_config["objects"][object_config["center"]]
-        radius = float(
-            np.random.uniform(self.scene_config["sizes"][center["size"]] * 2.0, 5.0)
-        )
-
-        # Utility function for location dependent on the frame
-        def orbiting_location(center_x: float, center_y: float, frame: int):
-            return {
-                "x": float(
-                    center_x + radius * np.cos(initial_angle + angle_increment * frame)
-                ),
-                "y": float(
-                    center_y + radius * np.sin(initial_angle + angle_increment * frame)
+        # Select random object as center of orbit, or only among those that allow an orbit through free space
+        orbit = None
+        if self.sampler is not None:
+            frames = np.arange(int(self.scene_config["fps"] * self.scene_config["duration"]))
+            angles = initial_angle + angle_increment * (frames % period)
+            orbit = self.sampler.sample_orbit(
+                np.stack([np.cos(angles), np.sin(angles)], axis=-1),
+                np.array(
+                    [self.scene_config["sizes"][obj["size"]] * 2.0 for obj in self.scene_config["objects"]]
                 ),
-            }
+                5.0,
+                rng,
+            )
 
-        # Set the object's locations through time
-        states = []
-        for base_frame in range(
-            1, int(self.scene_config["fps"] * self.scene_config["duration"]) + 1, period
-        ):
-            for cycle_frame in range(period):
-                frame = base_frame + cycle_frame
-
-                if "cycles" in center.keys() and "orbit" in center["cycles"].keys():
-                    center_x = float(
-                        center["cycles"]["orbit"]["states"][frame - 1]["location"]["x"]
-                    )
-                    center_y = float(
-                        center["cycles"]["orbit"]["states"][frame - 1]["location"]["y"]
-                    )
-                elif "cycles" in center.keys() and "linear" in center["cycles"].keys():
-                    center_x = float(
-                        center["cycles"]["linear"]["states"][frame - 1]["location"]["x"]
-                    )
-                    center_y = float(
-                        center["cycles"]["linear"]["states"][frame - 1]["location"]["y"]
-                    )
-                else:
-                    center_x = float(center["location"]["x"])
-                    center_y = float(center["location"]["y"])
-
-                states.append(
-                    {
-                        "location": orbiting_location(center_x, center_y, cycle_frame),
-                        "frame": frame,
-                    }
-                )
+        if orbit is not None:
+            object_config["center"], radius = orbit
+        else:
+            object_config["center"] = int(
+                rng.choice(range(len(self.scene_config["objects"])))
+            )
+            center = self.scene_config["objects"][object_config["center"]]
+            radius = float(
+                rng.uniform(self.scene_config["sizes"][center["size"]] * 2.0, 5.0)
+            )
 
+        # Store the orbit's parameters, its locations are evaluated on demand by CycleTrajectory
         object_config["cycles"]["orbit"]["period"] = period
-        object_config["cycles"]["orbit"]["states"] = states
+        object_config["cycles"]["orbit"]["initial_angle"] = float(initial_angle)
+        object_config["cycles"]["orbit"]["angle_increment"] = float(angle_increment)
+        object_config["cycles"]["orbit"]["radius"] = radius
 
-    def apply_linear(self, object_config: dict[str, Any]):
+    def apply_linear(self, object_config: dict[str, Any], rng: np.random.Generator):
         # Get cycle period in frames
-        period = self.choose_period()
+        period = self.choose_period(rng)
 
         # Generate start and intermittent location
-        object_config["location"] = {
-            "x": float(
-                np.random.uniform(
-                    self.scene_config["min_x"], self.scene_config["max_x"]
-                )
-            ),
-            "y": float(
-                np.random.uniform(
-                    self.scene_config["min_y"], self.scene_config["max_y"]
-                )
-            ),
-            "z": self.scene_config["sizes"][object_config["size"]],
-        }
-        object_config["intermittent_location"] = {
-            "x": float(
-                np.random.uniform(
-                    self.scene_config["min_x"], self.scene_config["max_x"]
-                )
-            ),
-            "y": float(
-                np.random.uniform(
-                    self.scene_config["min_y"], self.scene_config["max_y"]
-                )
-            ),
-            "z": self.scene_config["sizes"][object_config["size"]],
-        }
-
-        # Get the distance the object will move in a single frame
-        distance = np.array(
-            [
-                object_config["intermittent_location"]["x"]
-                - object_config["location"]["x"],
-                object_config["intermittent_location"]["y"]
-                - object_config["location"]["y"],
-            ]
-        )
-
-        # Set the object's locations through time
-        states = []
-        for base_frame in range(
-            1, int(self.scene_config["fps"] * self.scene_config["duration"]) + 1, period
-        ):
-            # Moving towards intermittent location
-            for cycle_frame in range(period):
-                if cycle_frame <= period / 2.0:
-                    displacement = cycle_frame / (period / 2.0) * distance
-                # Arrived there and moving back again
-                else:
-                    displacement = (
-                        distance
-                        - (cycle_frame - period / 2.0) / (period / 2.0) * distance
-                    )
-
-                # The location for the frame
-                states.append(
-                    {
-                        "location": {
-                            "x": object_config["location"]["x"] + displacement[0],
-                            "y": object_config["location"]["y"] + displacement[1],
-                        },
-                        "frame": base_frame + cycle_frame,
-                    }
-                )
+        object_config["location"] = self.sample_location(object_config, rng)
+        object_config["intermittent_location"] = self.sample_location(object_config, rng)
 
+        # The object moves between both locations, evaluated on demand by CycleTrajectory
         object_config["cycles"]["linear"]["period"] = period
-        object_config["cycles"]["linear"]["states"] = states
 
-    def apply_resize(self, object_config: dict[str, Any]):
+    def apply_resize(self, object_config: dict[str, Any], rng: np.random.Generator):
         # Get cycle period in frames and select other size
-        period = self.choose_period()
+        period = self.choose_period(rng)
         object_config["intermittent_size"] = str(
-            np.random.choice(
+            rng.choice(
                 [
                     color
                     for color in self.scene_config["sizes"].keys()
@@ -244,11 +188,11 @@ class Cycle:
         object_config["cycles"]["resize"]["period"] = period
         object_config["cycles"]["resize"]["states"] = states
 
-    def apply_recolor(self, object_config: dict[str, Any]):
+    def apply_recolor(self, object_config: dict[str, Any], rng: np.random.Generator):
         # Get cycle period in frames and select intermittent color
-        period = self.choose_period()
+        period = self.choose_period(rng)
         object_config["intermittent_color"] = str(
-            np.random.choice(
+            rng.choice(
                 [
                     color
                     for color in self.scene_config["colors"].keys()
@@ -285,61 +229,47 @@ class Cycle:
         object_config["cycles"]["recolor"]["period"] = period
         object_config["cycles"]["recolor"]["states"] = states
 
-    def apply_rotate(self, object_config: dict[str, Any]):
+    def apply_rotate(self, object_config: dict[str, Any], rng: np.random.Generator):
         # Ger period and angle difference per frame
-        period = self.choose_period()
+        period = self.choose_period(rng)
 
         angle_per_frame = np.zeros(3)
         angle_per_frame[0] = 2.0 * np.pi / period
 
-        # Set angle difference for each frame for smooth transitions
-        states = []
-        for base_frame in range(
-            1, int(self.scene_config["fps"] * self.scene_config["duration"]) + 1, period
-        ):
-            for cycle_frame in range(period):
-                states.append(
-                    {
-                        "rotation": list(cycle_frame * angle_per_frame),
-                        "frame": base_frame + cycle_frame,
-                    }
-                )
-
+        # The rotation at each frame is evaluated on demand by CycleTrajectory
         object_config["cycles"]["rotate"]["period"] = period
-        object_config["cycles"]["rotate"]["states"] = states
+        object_config["cycles"]["rotate"]["angle_per_frame"] = [float(angle) for angle in angle_per_frame]
 
-    def apply_light(self) -> None:
-        """Make the lights go through a day-night cycle."""
+    def apply_light(self, rng: np.random.Generator) -> None:
+        """Make the lights go through a day-night cycle.
+
+        Args:
+            rng: The random number generator to draw from
+        """
         
         # Ger lighting period
-        period = self.choose_period()
+        period = self.choose_period(rng)
         
-        # Set light intensity for each frame
-        states = []
-        for base_frame in range(
-            1, int(self.scene_config["fps"] * self.scene_config["duration"]) + 1, period
-        ):
-            for cycle_frame in range(period):
-                states.append(
-                    {
-                        "intensity": 0.5 * np.cos((cycle_frame / period) * (2 * np.pi)) + 0.5,
-                        "frame": base_frame + cycle_frame,
-                    }
-                )
-
+        # The light intensity at each frame is evaluated on demand by cyclist.scene.trajectory.light_intensity
         self.scene_config['lights'] = {
             'period': period,
-            'states': states,
         }
 
-    def apply(self, object_config: dict[str, Any]) -> None:
+    def apply(self, object_config: dict[str, Any], rng: np.random.Generator) -> None:
+        """Applies all cycles assigned to an object.
+
+        Args:
+            object_config: The object with its cycles, whose parameters are added in-place
+            rng: The random number generator to draw the cycle parameters from
+        """
+
         if "recolor" in object_config["cycles"]:
-            self.apply_recolor(object_config)
+            self.apply_recolor(object_config, rng)
         if "rotate" in object_config["cycles"]:
-            self.apply_rotate(object_config)
+            self.apply_rotate(object_config, rng)
         if "resize" in object_config["cycles"]:
-            self.apply_resize(object_config)
+            self.apply_resize(object_config, rng)
         if "linear" in object_config["cycles"]:
-            self.apply_linear(object_config)
+            self.apply_linear(object_config, rng)
         if "orbit" in object_config["cycles"]:
-            self.apply_orbit(object_config)
+            self.apply_orbit(object_config, rng)
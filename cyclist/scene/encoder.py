@@ -0,0 +1,367 @@
+"""This file contains the encoding stage, turning rendered frames into the final videos."""
+
+# Standard Library
+from concurrent.futures import Future, ThreadPoolExecutor
+from copy import deepcopy
+from functools import partial
+from typing import Any
+import json
+import os
+import shutil
+import subprocess
+
+# Third Party
+import numpy as np
+
+# File extension of each frame format Blender can render to
+FRAME_EXTENSIONS = {"PNG": ".png", "OPEN_EXR": ".exr"}
+
+
+def ffmpeg_available() -> bool:
+    """Checks if ffmpeg can be called for encoding.
+
+    Returns:
+        True if an ffmpeg executable has been found, else False
+    """
+
+    return shutil.which("ffmpeg") is not None
+
+
+def loop_video(period_path: str, video_path: str, number_of_loops: int) -> bool:
+    """Repeats a video, e.g., one rendered period of a scene, without encoding it again.
+
+    Args:
+        period_path: The video to repeat, which is removed afterwards
+        video_path: The path to write the repeated video to
+        number_of_loops: How many times the video is played in total
+
+    Returns:
+        True if the video has been written, False otherwise in which case the input is kept
+    """
+
+    completed = subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-loglevel",
+            "error",
+            "-stream_loop",
+            str(number_of_loops - 1),
+            "-i",
+            period_path,
+            "-c",
+            "copy",
+            video_path,
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        print(completed.stderr)
+        return False
+
+    os.remove(period_path)
+
+    return True
+
+
+def get_frame_directory(scene_config: dict[str, Any]) -> str:
+    """Gets the directory a scene's frames are rendered to.
+
+    Args:
+        scene_config: The configuration of the scene
+
+    Returns:
+        The path of the directory named after the scene's video
+    """
+
+    return os.path.join(
+        scene_config["frame_directory"], os.path.splitext(scene_config["video_file"])[0]
+    )
+
+
+def get_video_variants(scene_config: dict[str, Any]) -> dict[str, str]:
+    """Gets the file names of the downscaled variants of a scene's video.
+
+    Args:
+        scene_config: The configuration of the scene
+
+    Returns:
+        The video file name for each resolution, e.g., 224x224
+    """
+
+    name = os.path.splitext(scene_config["video_file"])[0]
+
+    return {
+        resolution: f"{name}_{resolution}.mp4"
+        for resolution in scene_config["encode_resolutions"]
+    }
+
+
+def get_frame_tensors(scene_config: dict[str, Any]) -> dict[str, dict[str, str]]:
+    """Gets the file names of the sampled frame tensors of a scene.
+
+    Args:
+        scene_config: The configuration of the scene
+
+    Returns:
+        The files of the frames, their timestamps and their metadata, i.e., the number of frames of the
+        video, its frame rate and the sampled indices, for each sampling rate in frames per second
+    """
+
+    name = os.path.splitext(scene_config["video_file"])[0]
+
+    return {
+        str(sampled_fps): {
+            "frames": f"{name}_{sampled_fps}fps.npy",
+            "frame_times": f"{name}_{sampled_fps}fps_times.npy",
+            "metadata": f"{name}_{sampled_fps}fps.json",
+        }
+        for sampled_fps in scene_config["tensor_fps"]
+    }
+
+
+def sample_frame_indices(number_of_frames: int, fps: int, sampled_fps: int) -> np.ndarray:
+    """Samples frames uniformly, the same as cyclist.eval.data.load_vid.read_video_pyav does when decoding a video.
+
+    Args:
+        number_of_frames: The number of frames of the video
+        fps: The frame rate of the video
+        sampled_fps: The number of frames to sample per second
+
+    Returns:
+        The 0-based indices of the sampled frames
+    """
+
+    sampled_length = number_of_frames / fps * sampled_fps
+
+    return np.arange(0, number_of_frames, number_of_frames / sampled_length).astype(int)
+
+
+def write_frame_tensors(scene_config: dict[str, Any]) -> bool:
+    """Writes the sampled frames of a scene as uint8 arrays of shape (frames, height, width, 3), which can be memory-mapped.
+
+    Args:
+        scene_config: The configuration of the scene
+
+    Returns:
+        True if all arrays have been written, False otherwise
+    """
+
+    number_of_frames = int(scene_config["fps"] * scene_config["duration"])
+    width, height = scene_config["resolution_width"], scene_config["resolution_height"]
+    if scene_config["tensor_resolution"] is not None:
+        width, height = (int(length) for length in scene_config["tensor_resolution"].split("x"))
+
+    # Decode all frames once, looped to the full length, and sample them for each rate
+    command = ["ffmpeg", "-loglevel", "error"]
+    if scene_config["frame_format"] == "OPEN_EXR":
+        command += ["-apply_trc", "iec61966_2_1"]
+    command += [
+        "-framerate",
+        str(scene_config["fps"]),
+        "-start_number",
+        "1",
+        "-loop",
+        "1",
+        "-i",
+        os.path.join(
+            get_frame_directory(scene_config),
+            "%04d" + FRAME_EXTENSIONS[scene_config["frame_format"]],
+        ),
+        "-frames:v",
+        str(number_of_frames),
+        "-vf",
+        f"scale={width}:{height}",
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "rgb24",
+        "-",
+    ]
+
+    completed = subprocess.run(command, capture_output=True)
+    if completed.returncode != 0:
+        print(completed.stderr.decode())
+        return False
+    frames = np.frombuffer(completed.stdout, dtype=np.uint8).reshape(-1, height, width, 3)
+
+    os.makedirs(scene_config["tensor_directory"], exist_ok=True)
+    for sampled_fps, files in get_frame_tensors(scene_config).items():
+        indices = sample_frame_indices(len(frames), scene_config["fps"], int(sampled_fps))
+        np.save(os.path.join(scene_config["tensor_directory"], files["frames"]), frames[indices])
+        np.save(
+            os.path.join(scene_config["tensor_directory"], files["frame_times"]),
+            np.round(indices / scene_config["fps"], 2),
+        )
+        with open(os.path.join(scene_config["tensor_directory"], files["metadata"]), "w") as metadata_file:
+            json.dump(
+                {
+                    "number_of_frames": len(frames),
+                    "fps": scene_config["fps"],
+                    "frame_indices": indices.tolist(),
+                },
+                metadata_file,
+                indent=2,
+            )
+
+    return True
+
+
+def encode_frames(scene_config: dict[str, Any], video_path: str, resolution: str | None = None) -> bool:
+    """Encodes the rendered frames of a scene to a video, looping them if only a single period has been rendered.
+
+    Args:
+        scene_config: The configuration of the scene
+        video_path: The path to write the video to
+        resolution: The resolution as width x height, e.g., 224x224, or None to keep the rendered resolution
+
+    Returns:
+        True if the video has been written, False otherwise
+    """
+
+    number_of_frames = int(scene_config["fps"] * scene_config["duration"])
+    frame_pattern = os.path.join(
+        get_frame_directory(scene_config),
+        "%04d" + FRAME_EXTENSIONS[scene_config["frame_format"]],
+    )
+
+    command = ["ffmpeg", "-y", "-loglevel", "error"]
+    if scene_config["frame_format"] == "OPEN_EXR":
+        # Frames are stored in linear color
+        command += ["-apply_trc", "iec61966_2_1"]
+    command += [
+        "-framerate",
+        str(scene_config["fps"]),
+        "-start_number",
+        "1",
+        "-loop",
+        "1",
+        "-i",
+        frame_pattern,
+        "-frames:v",
+        str(number_of_frames),
+    ]
+    if resolution is not None:
+        width, height = resolution.split("x")
+        command += ["-vf", f"scale={width}:{height}"]
+    command += [
+        "-c:v",
+        "libx264",
+        "-preset",
+        scene_config["encode_preset"],
+        "-crf",
+        str(scene_config["encode_crf"]),
+        "-pix_fmt",
+        "yuv420p",
+        video_path,
+    ]
+
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        print(completed.stderr)
+        return False
+
+    return True
+
+
+def encode_scene(scene_config: dict[str, Any]) -> bool:
+    """Encodes the video, all its downscaled variants and frame tensors from the rendered frames of a scene.
+
+    Args:
+        scene_config: The configuration of the scene
+
+    Returns:
+        True if all videos have been written, False otherwise
+    """
+
+    if not ffmpeg_available():
+        print(f"Cannot encode {scene_config['video_file']} without ffmpeg, its frames are kept")
+        return False
+
+    success = encode_frames(
+        scene_config, os.path.join(scene_config["video_directory"], scene_config["video_file"])
+    )
+    for resolution, video_file in get_video_variants(scene_config).items():
+        success &= encode_frames(
+            scene_config, os.path.join(scene_config["video_directory"], video_file), resolution
+        )
+    if scene_config["tensor_fps"]:
+        success &= write_frame_tensors(scene_config)
+
+    if not success:
+        print(f"Failed to encode {scene_config['video_file']}")
+
+    return success
+
+
+# Encodings run in background threads of this process, started on first use
+executor = None
+
+# Video files of the scenes whose encoding failed since the last wait_for_encodings
+failures = []
+
+
+def finish_encoding(scene_config: dict[str, Any], future: Future) -> None:
+    """Marks a scene as not rendered in its written configuration if encoding it failed.
+
+    Args:
+        scene_config: The configuration of the scene
+        future: The finished encoding of the scene
+    """
+
+    if future.exception() is None and future.result():
+        return
+
+    if future.exception() is not None:
+        print(f"Encoding {scene_config['video_file']} raised {future.exception()!r}")
+
+    scene_config_file_path = os.path.join(scene_config["scene_config_directory"], scene_config["scene_config_file"])
+    with open(scene_config_file_path, "r") as scene_config_file:
+        written_scene_config = json.load(scene_config_file)
+    written_scene_config["rendered"] = False
+    with open(scene_config_file_path, "w") as scene_config_file:
+        json.dump(written_scene_config, scene_config_file, indent=2)
+
+    failures.append(scene_config["video_file"])
+
+
+def submit_encoding(scene_config: dict[str, Any]) -> Future:
+    """Encodes a scene in the background, e.g., while the next scene is rendered.
+
+    The scene's configuration has to be written already, as a failed encoding marks it as not rendered.
+
+    Args:
+        scene_config: The configuration of the scene
+
+    Returns:
+        The future result of encode_scene
+    """
+
+    global executor
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers=scene_config["encode_workers"])
+
+    scene_config = deepcopy(scene_config)
+    future = executor.submit(encode_scene, scene_config)
+    future.add_done_callback(partial(finish_encoding, scene_config))
+
+    return future
+
+
+def wait_for_encodings() -> list[str]:
+    """Waits for all encodings submitted by this process to finish.
+
+    Returns:
+        The video files of the scenes whose encoding failed, which are marked as not rendered
+    """
+
+    global executor
+    if executor is not None:
+        executor.shutdown(wait=True)
+        executor = None
+
+    failed = list(failures)
+    failures.clear()
+
+    return failed
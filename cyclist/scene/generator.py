@@ -1,6 +1,7 @@
 """This file contains the CycliST scene generator, a class to create randomized CycliST scenes."""
 
 # Standard Library
+from collections import Counter, deque
 from typing import Any
 from copy import deepcopy
 import os
@@ -10,7 +11,10 @@ import numpy as np
 
 # CycliST
 from .cycle import Cycle
+from .sampler import PlacementSampler
+from .streams import RandomStreams
 from .validator import Validator
+from cyclist.utility import get_trajectory
 
 
 class Generator:
@@ -29,28 +33,60 @@ class Generator:
         self.validator = Validator()
         self.scene_config = scene_config
 
+        # Optionally propose locations only from the space not swept by placed objects
+        self.sampler = None
+        if scene_config["free_space_sampling"]:
+            self.sampler = PlacementSampler(scene_config)
+            self.cycle.sampler = self.sampler
+
+        # The frame and index of the existing object that caused the last rejection
+        self.last_collision = None
+
+        # Every restart draws from fresh random streams
+        self.streams = None
+        self.restarts = 0
+
+        # What each placed object was generated from, None for pre-determined ones, which are never re-sampled
+        self.templates = []
+
+        # Tries spent per position of the objects list, so that re-sampled objects draw from unused streams
+        self.tries = {}
+
+        # How often existing objects blocked the object currently being placed
+        self.collisions = Counter()
+
+        # Tries, backtracks and restarts over all attempts at generating the scene
+        self.statistics = {"tries": 0, "backtracks": 0, "restarts": 0}
+
     @staticmethod
-    def get_random_asset(directory: str) -> str:
+    def get_random_asset(directory: str, rng: np.random.Generator) -> str:
         """Selects a random asset, e.g., mesh or material, from a directory.
 
         Args:
             directory: The directory to select an asset from
+            rng: The random number generator to draw from
 
         Returns:
             The name of a random asset from the chosen directory including its file extension
         """
 
+        # Sorted since the order of listed files depends on the file system
         assets = []
-        for file in os.listdir(directory):
+        for file in sorted(os.listdir(directory)):
             if file.endswith(".blend"):
                 assets.append(os.path.splitext(file)[0])
 
-        return str(np.random.choice(assets))
+        return str(rng.choice(assets))
 
     def restart(self) -> None:
         """Clears all generated info from the scene."""
 
         del self.scene_config['objects']
+        self.restarts += 1
+        self.statistics["restarts"] += 1
+        self.validator.reset()
+        if self.sampler is not None:
+            self.sampler.reset()
 
     def generate(self) -> bool:
         """Generates a scene according to the provided configuration.
@@ -61,76 +97,78 @@ class Generator:
             False if the scene could not be generated, e.g., without violating margins, else True
         """
 
+        # Scene-wide decisions are drawn from the streams of the current restart
+        self.streams = RandomStreams(self.scene_config["seed"], self.scene_config["scene_index"])
+        placement_rng = self.streams.get("placement", self.restarts)
+        cycles_rng = self.streams.get("cycles", self.restarts)
+
         # Autocomplete what has been provided beforehand
         # So the user can decide some guarantees
         predetermined = deepcopy(self.scene_config.get("objects", []))
         self.scene_config["objects"] = []
+        self.templates = []
+        self.tries = {}
+        self.validator.reset()
+        if self.sampler is not None:
+            self.sampler.reset()
         for object_config in predetermined:
             print(f"Autocomplete pre-determined object with {object_config} ...")
-            success = False
-            for number_of_tries in range(self.scene_config["max_number_of_tries"]):
-                trial = deepcopy(object_config)
-                if self.generate_object(trial):
-                    print(f"... took {number_of_tries + 1} tries")
-                    self.add_object(trial)
-                    success = True
-                    break
+            self.place_object(object_config, removable=False)
 
         # Add the static clutter objects
         if self.scene_config["number_of_clutter_objects"] is None:
-            self.scene_config["number_of_clutter_objects"] = np.random.randint(
-                self.scene_config["min_number_of_clutter_objects"],
-                self.scene_config["max_number_of_clutter_objects"] + 1,
+            self.scene_config["number_of_clutter_objects"] = int(
+                placement_rng.integers(
+                    self.scene_config["min_number_of_clutter_objects"],
+                    self.scene_config["max_number_of_clutter_objects"] + 1,
+                )
             )
 
         print(
             f"Generate {self.scene_config['number_of_clutter_objects']} clutter objects."
         )
-        for _ in range(self.scene_config["number_of_clutter_objects"]):
-            print(f"Generate clutter object ...")
-
-            success = False
-            for number_of_tries in range(self.scene_config["max_number_of_tries"]):
-                object_config = {}
-                if self.generate_object(object_config):
-                    print(f"... took {number_of_tries + 1} tries")
-                    self.add_object(object_config)
-                    success = True
-                    break
-
-            if not success:
-                print(f"... failed to insert within {number_of_tries + 1} tries!")
-                return False
+        if not self.place_objects([{} for _ in range(self.scene_config["number_of_clutter_objects"])]):
+            return False
 
         # Decide how many cycles of each type will be generated
         if self.scene_config["number_of_resize_cycles"] is None:
-            self.scene_config["number_of_resize_cycles"] = np.random.randint(
-                self.scene_config["min_number_of_resize_cycles"],
-                self.scene_config["max_number_of_resize_cycles"] + 1,
+            self.scene_config["number_of_resize_cycles"] = int(
+                cycles_rng.integers(
+                    self.scene_config["min_number_of_resize_cycles"],
+                    self.scene_config["max_number_of_resize_cycles"] + 1,
+                )
             )
 
         if self.scene_config["number_of_orbit_cycles"] is None:
-            self.scene_config["number_of_orbit_cycles"] = np.random.randint(
-                self.scene_config["min_number_of_orbit_cycles"],
-                self.scene_config["max_number_of_orbit_cycles"] + 1,
+            self.scene_config["number_of_orbit_cycles"] = int(
+                cycles_rng.integers(
+                    self.scene_config["min_number_of_orbit_cycles"],
+                    self.scene_config["max_number_of_orbit_cycles"] + 1,
+                )
             )
 
         if self.scene_config["number_of_recolor_cycles"] is None:
-            self.scene_config["number_of_recolor_cycles"] = np.random.randint(
-                self.scene_config["min_number_of_recolor_cycles"],
-                self.scene_config["max_number_of_recolor_cycles"] + 1,
+            self.scene_config["number_of_recolor_cycles"] = int(
+                cycles_rng.integers(
+                    self.scene_config["min_number_of_recolor_cycles"],
+                    self.scene_config["max_number_of_recolor_cycles"] + 1,
+                )
             )
 
         if self.scene_config["number_of_linear_cycles"] is None:
-            self.scene_config["number_of_linear_cycles"] = np.random.randint(
-                self.scene_config["min_number_of_linear_cycles"],
-                self.scene_config["max_number_of_linear_cycles"] + 1,
+            self.scene_config["number_of_linear_cycles"] = int(
+                cycles_rng.integers(
+                    self.scene_config["min_number_of_linear_cycles"],
+                    self.scene_config["max_number_of_linear_cycles"] + 1,
+                )
             )
 
         if self.scene_config["number_of_rotate_cycles"] is None:
-            self.scene_config["number_of_rotate_cycles"] = np.random.randint(
-                self.scene_config["min_number_of_rotate_cycles"],
-                self.scene_config["max_number_of_rotate_cycles"] + 1,
+            self.scene_config["number_of_rotate_cycles"] = int(
+                cycles_rng.integers(
+                    self.scene_config["min_number_of_rotate_cycles"],
+                    self.scene_config["max_number_of_rotate_cycles"] + 1,
+                )
             )
 
         self.scene_config["max_number_of_cyclic_objects"] = (
@@ -143,14 +181,14 @@ class Generator:
 
         # Decide which objects will do which cycles
         orbit_indices = set(
-            np.random.choice(
+            cycles_rng.choice(
                 range(self.scene_config["max_number_of_cyclic_objects"]),
                 size=self.scene_config["number_of_orbit_cycles"],
                 replace=False,
             )
         )
         linear_indices = set(
-            np.random.choice(
+            cycles_rng.choice(
                 list(
                     set(range(self.scene_config["max_number_of_cyclic_objects"]))
                     - orbit_indices
@@ -160,21 +198,21 @@ class Generator:
             )
         )
         resize_indices = set(
-            np.random.choice(
+            cycles_rng.choice(
                 range(self.scene_config["max_number_of_cyclic_objects"]),
                 size=self.scene_config["number_of_resize_cycles"],
                 replace=False,
             )
         )
         recolor_indices = set(
-            np.random.choice(
+            cycles_rng.choice(
                 range(self.scene_config["max_number_of_cyclic_objects"]),
                 size=self.scene_config["number_of_recolor_cycles"],
                 replace=False,
             )
         )
         rotate_indices = set(
-            np.random.choice(
+            cycles_rng.choice(
                 range(self.scene_config["max_number_of_cyclic_objects"]),
                 size=self.scene_config["number_of_rotate_cycles"],
                 replace=False,
@@ -205,7 +243,7 @@ class Generator:
                 object_config["mesh"] = "Sphere"
                 while object_config["mesh"] == "Sphere":
                     object_config["mesh"] = self.get_random_asset(
-                        self.scene_config["mesh_directory"]
+                        self.scene_config["mesh_directory"], placement_rng
                     )
 
             # If no cycles where assigned, drop the object
@@ -215,46 +253,146 @@ class Generator:
             object_config["cycles"] = cycles
             object_configs.append(object_config)
 
-        for object_config in object_configs:
-            # Ignore orbiting objects the first time around since they need possible center objects to exist first
-            if "orbit" in object_config["cycles"].keys():
-                continue
+        # Orbiting objects come last since they need possible center objects to exist first
+        if not self.place_objects(
+            [object_config for object_config in object_configs if "orbit" not in object_config["cycles"].keys()]
+            + [object_config for object_config in object_configs if "orbit" in object_config["cycles"].keys()]
+        ):
+            return False
 
-            print(f"Generate cyclic object with {object_config} ...")
-            success = False
-            for number_of_tries in range(self.scene_config["max_number_of_tries"]):
-                trial = deepcopy(object_config)
-                if self.generate_object(trial):
-                    print(f"... took {number_of_tries + 1} tries")
-                    self.add_object(trial)
-                    success = True
-                    break
-
-            if not success:
-                print(f"... failed to insert within {number_of_tries + 1} tries!")
-                return False
+        self.scene_config["generation_statistics"] = dict(self.statistics)
+        print(
+            f"Generated {len(self.scene_config['objects'])} objects with {self.statistics['tries']} tries, "
+            f"{self.statistics['backtracks']} backtracks and {self.statistics['restarts']} restarts."
+        )
 
-        for object_config in object_configs:
-            # Ignore non-orbiting objects since we already added them above
-            if not "orbit" in object_config["cycles"].keys():
+        return True
+
+    def place_objects(self, object_configs: list[dict[str, Any]]) -> bool:
+        """Places objects one after another, re-sampling objects that block one of them if backtracks are left.
+
+        When an object cannot be placed within max_number_of_tries, the placed object it collided with most
+        often is removed, together with all objects orbiting it. The blocked object is then placed first,
+        followed by the removed ones. At most max_number_of_backtracks objects are removed per scene.
+
+        Args:
+            object_configs: The configurations to generate the objects from, in order
+
+        Returns:
+            False if an object could not be placed without any backtracks left, else True
+        """
+
+        queue = deque(object_configs)
+        while len(queue) > 0:
+            object_config = queue.popleft()
+            if "cycles" in object_config.keys():
+                print(f"Generate cyclic object with {object_config} ...")
+            else:
+                print(f"Generate clutter object ...")
+
+            if self.place_object(object_config):
                 continue
 
-            print(f"Generate cyclic object with {object_config} ...")
-            success = False
-            for number_of_tries in range(self.scene_config["max_number_of_tries"]):
-                trial = deepcopy(object_config)
-                if self.generate_object(trial):
-                    print(f"... took {number_of_tries + 1} tries")
-                    self.add_object(trial)
-                    success = True
-                    break
-
-            if not success:
-                print(f"... failed to insert within {number_of_tries + 1} tries!")
+            if self.statistics["backtracks"] >= self.scene_config["max_number_of_backtracks"]:
                 return False
 
+            removed = self.backtrack()
+            if len(removed) == 0:
+                return False
+
+            queue.extendleft(reversed([object_config] + removed))
+
         return True
 
+    def place_object(self, object_config: dict[str, Any], removable: bool = True) -> bool:
+        """Tries to generate and add an object up to max_number_of_tries times.
+
+        Args:
+            object_config: The configuration to generate the object from, copied for each try
+            removable: Whether the object may be re-sampled when it blocks another one
+
+        Returns:
+            False if the object could not be placed, else True
+        """
+
+        position = len(self.scene_config["objects"])
+        first_try = self.tries.get(position, 0)
+        self.collisions = Counter()
+
+        for number_of_tries in range(self.scene_config["max_number_of_tries"]):
+            self.tries[position] = first_try + number_of_tries + 1
+            self.statistics["tries"] += 1
+
+            trial = deepcopy(object_config)
+            if self.generate_object(trial, first_try + number_of_tries):
+                print(f"... took {number_of_tries + 1} tries")
+                self.add_object(trial)
+                self.templates.append(deepcopy(object_config) if removable else None)
+                return True
+
+            if self.last_collision is not None:
+                self.collisions[self.last_collision[1]] += 1
+
+        self.report_failure(number_of_tries)
+
+        return False
+
+    def backtrack(self) -> list[dict[str, Any]]:
+        """Removes the placed object that blocked the last object most often, and all objects orbiting it.
+
+        Returns:
+            The configurations the removed objects were generated from, in order, or an empty list if
+            only pre-determined objects blocked the last object
+        """
+
+        blockers = [index for index, _ in self.collisions.most_common() if self.templates[index] is not None]
+        if len(blockers) == 0:
+            return []
+
+        # Centers always precede the objects orbiting them, so one pass finds orbits of orbits as well
+        removed = {blockers[0]}
+        for index, obj in enumerate(self.scene_config["objects"]):
+            if obj.get("center") in removed:
+                removed.add(index)
+
+        self.statistics["backtracks"] += 1
+        print(f"... backtracking, re-sampling objects {sorted(removed)}")
+
+        # Keep the remaining objects, pointing orbits to the new indices of their centers
+        kept = [index for index in range(len(self.scene_config["objects"])) if index not in removed]
+        new_indices = {index: new_index for new_index, index in enumerate(kept)}
+        objects = [self.scene_config["objects"][index] for index in kept]
+        for obj in objects:
+            if "center" in obj:
+                obj["center"] = new_indices[obj["center"]]
+
+        removed_templates = [self.templates[index] for index in sorted(removed)]
+        self.templates = [self.templates[index] for index in kept]
+        self.scene_config["objects"] = objects
+
+        # Rebuild the caches of the validator and the free space from the remaining objects
+        self.validator.reset()
+        if self.sampler is not None:
+            self.sampler.reset()
+            for obj in objects:
+                self.sampler.occupy(
+                    get_trajectory(obj, int(self.scene_config["fps"] * self.scene_config["duration"]), objects)
+                )
+
+        return removed_templates
+
+    def report_failure(self, number_of_tries: int) -> None:
+        """Prints that an object could not be inserted and which existing object blocked it last.
+
+        Args:
+            number_of_tries: The index of the last try
+        """
+
+        print(f"... failed to insert within {number_of_tries + 1} tries!")
+        if self.last_collision is not None:
+            frame, index = self.last_collision
+            print(f"... last try collided with object {index} in frame {frame}")
+
     def add_object(self, object_config: dict[str, Any]) -> None:
         """Add an object to the scene.
 
@@ -266,8 +404,19 @@ class Generator:
         if "objects" not in self.scene_config.keys():
             self.scene_config["objects"] = []
         self.scene_config["objects"].append(object_config)
+        self.validator.accept(self.scene_config, object_config)
+
+        # Mark the space swept by the object as occupied
+        if self.sampler is not None:
+            self.sampler.occupy(
+                get_trajectory(
+                    object_config,
+                    int(self.scene_config["fps"] * self.scene_config["duration"]),
+                    self.scene_config["objects"],
+                )
+            )
 
-    def generate_object(self, object_config: dict[str, Any]) -> bool:
+    def generate_object(self, object_config: dict[str, Any], number_of_tries: int) -> bool:
         """Generate an object for the scene.
 
         The method follows the idea that everything is generated randomly if
@@ -276,68 +425,68 @@ class Generator:
         generated, letting the caller decide what parts should be deterministic
         and what is random.
 
+        Random choices are drawn from streams keyed by the restart, the object's index and
+        the try, which is stored as the object's stream key. For example, passing
+        RandomStreams.get("cycles", *stream_key) to Cycle.apply regenerates its cycles.
+
         Args:
             object_config: A dictionary describing the objects properties
+            number_of_tries: How many times inserting this object has been tried before
 
         Returns:
             False if the object could not be generated, e.g., without violating margins, else True
         """
 
+        object_config["stream_key"] = [
+            self.restarts,
+            len(self.scene_config["objects"]),
+            number_of_tries,
+        ]
+        placement_rng = self.streams.get("placement", *object_config["stream_key"])
+        cycles_rng = self.streams.get("cycles", *object_config["stream_key"])
+        colors_rng = self.streams.get("colors", *object_config["stream_key"])
+
         # Decide random mesh if none was given
         if "mesh" not in object_config.keys():
             object_config["mesh"] = self.get_random_asset(
-                self.scene_config["mesh_directory"]
+                self.scene_config["mesh_directory"], placement_rng
             )
 
         # Decide random material if none was given
         if "material" not in object_config.keys():
             object_config["material"] = self.get_random_asset(
-                self.scene_config["material_directory"]
+                self.scene_config["material_directory"], placement_rng
             )
 
         # Decide random size if none was given
         if "size" not in object_config.keys():
             object_config["size"] = str(
-                np.random.choice(list(self.scene_config["sizes"].keys()))
+                placement_rng.choice(list(self.scene_config["sizes"].keys()))
             )
 
         # Decide random color if none was given
         if "color" not in object_config.keys():
             object_config["color"] = str(
-                np.random.choice(list(self.scene_config["colors"].keys()))
+                colors_rng.choice(list(self.scene_config["colors"].keys()))
             )
 
         # Add all the cycles, returning False if any single one was unable to be added
         if "cycles" in object_config.keys():
-            self.cycle.apply(object_config)
+            self.cycle.apply(object_config, cycles_rng)
 
         # Decide random orientation if none was given
         if "angle" not in object_config.keys():
-            object_config["angle"] = 2 * np.pi * np.random.uniform(0, 1)
+            object_config["angle"] = 2 * np.pi * placement_rng.uniform(0, 1)
 
         # Decide random location if none was given
         if "location" not in object_config.keys():
             # Set a random location
-            object_config["location"] = dict(
-                {
-                    "x": float(
-                        np.random.uniform(
-                            self.scene_config["min_x"], self.scene_config["max_x"]
-                        )
-                    ),
-                    "y": float(
-                        np.random.uniform(
-                            self.scene_config["min_y"], self.scene_config["max_y"]
-                        )
-                    ),
-                    "z": self.scene_config["sizes"][object_config["size"]],
-                }
-            )
+            object_config["location"] = self.cycle.sample_location(object_config, placement_rng)
 
-        # Check if scene is valid if the object is placed at that location
-        if "objects" in self.scene_config.keys():
-            objects = self.scene_config["objects"] + [object_config]
-        else:
-            objects = [object_config]
+        # Check if scene stays valid if the object is placed at that location
+        # Only the new object is tested against the already accepted ones
+        self.last_collision = self.validator.find_candidate_collision(
+            self.scene_config, object_config
+        )
 
-        return self.validator.is_always_collision_free(self.scene_config, objects)
+        return self.last_collision is None
@@ -3,27 +3,73 @@
 This file is supposed to be called as main file through Blender, using bpy to define
 the rendering pipeline. This will be triggered by running cyclist, but could me manually handled
 by running blender --background --python cyclist/scene/renderer.py -- --scene_config /path/to/scene/config.json.
+
+Running blender --background --python cyclist/scene/renderer.py -- --serve instead keeps Blender alive,
+rendering the scene configurations whose paths are written line by line to its standard input.
 """
 
 # Standard Library
 from typing import Any
+import argparse
 import os
 import json
+import traceback
 from time import time
 
 # Third Party
 import numpy as np
 
-
-def setup_rendering(scene_config: dict[str, Any]) -> None:
-    """Sets all Blender parameters used for rendering.
+# CycliST
+from cyclist.scene.encoder import FRAME_EXTENSIONS, ffmpeg_available, get_frame_directory, loop_video
+from cyclist.scene.streams import RandomStreams
+from cyclist.scene.trajectory import CycleTrajectory, hyperperiod
+from cyclist.scene.worker import CALIBRATED, FAILED, RENDERED
+
+# Objects of the base scene whose location is jittered and lights whose energy is animated
+JITTERED_OBJECTS = ("Camera", "Lamp_Key", "Lamp_Back", "Lamp_Fill")
+LIGHTS = ("Lamp_Key", "Lamp_Back", "Lamp_Fill", "Area")
+
+# Render settings of each quality tier, where None keeps the configured or base scene's setting
+QUALITY_TIERS = {
+    "preview": {
+        "engine": "BLENDER_EEVEE",
+        "samples": 4,
+        "max_bounces": None,
+        "noise_threshold": None,
+        "resolution_percentage": 50,
+    },
+    "draft": {
+        "engine": "CYCLES",
+        "samples": None,
+        "max_bounces": 2,
+        "noise_threshold": 0.1,
+        "resolution_percentage": 50,
+    },
+    "final": {
+        "engine": "CYCLES",
+        "samples": None,
+        "max_bounces": None,
+        "noise_threshold": None,
+        "resolution_percentage": 100,
+    },
+}
+
+# Cycles and EEVEE settings changed by quality tiers, which are restored between scenes
+TIERED_SETTINGS = ("max_bounces", "use_adaptive_sampling", "adaptive_threshold")
+TIERED_EEVEE_SETTINGS = ("taa_render_samples",)
+
+# Samples of the calibration renders estimating the time per sample, the more expensive first
+CALIBRATION_SAMPLES = (4, 1)
+
+
+def load_base_scene(scene_config: dict[str, Any]) -> None:
+    """Opens the base scene and appends all materials.
 
     Args:
         scene_config: The configuration of the scene following the arguments
             documented in cyclist/utility/parse_scene_config
     """
 
-    # Load base scene and materials
     bpy.ops.wm.open_mainfile(filepath=scene_config["base_scene_path"])
     for file in os.listdir(scene_config["material_directory"]):
         if file.endswith(".blend"):
@@ -33,14 +79,87 @@ def setup_rendering(scene_config: dict[str, Any]) -> None:
             )
             bpy.ops.wm.append(filename=material_path)
 
+
+def snapshot_scene() -> dict[str, Any]:
+    """Records the state of the loaded base scene that rendering a scene changes.
+
+    Returns:
+        The names of all data blocks, the locations of jittered objects and the energies of lights
+    """
+
+    return {
+        "objects": set(bpy.data.objects.keys()),
+        "meshes": set(bpy.data.meshes.keys()),
+        "materials": set(bpy.data.materials.keys()),
+        "node_groups": set(bpy.data.node_groups.keys()),
+        "actions": set(bpy.data.actions.keys()),
+        "locations": {name: bpy.data.objects[name].location.copy() for name in JITTERED_OBJECTS},
+        "energies": {name: bpy.data.objects[name].data.energy for name in LIGHTS},
+        "settings": {name: getattr(bpy.context.scene.cycles, name) for name in TIERED_SETTINGS},
+        "eevee_settings": {name: getattr(bpy.context.scene.eevee, name) for name in TIERED_EEVEE_SETTINGS},
+    }
+
+
+def reset_scene(snapshot: dict[str, Any]) -> None:
+    """Resets the base scene to a snapshot, removing all per-scene objects and keyframes.
+
+    Args:
+        snapshot: The state recorded by snapshot_scene after loading the base scene
+    """
+
+    # Remove what has been added for the last scene, e.g., objects, their materials and keyframes
+    for collection, names in (
+        (bpy.data.objects, snapshot["objects"]),
+        (bpy.data.meshes, snapshot["meshes"]),
+        (bpy.data.materials, snapshot["materials"]),
+        (bpy.data.node_groups, snapshot["node_groups"]),
+        (bpy.data.actions, snapshot["actions"]),
+    ):
+        for block in list(collection):
+            if block.name not in names:
+                collection.remove(block)
+
+    # Undo jitter and light cycles
+    for name, location in snapshot["locations"].items():
+        bpy.data.objects[name].location = location
+    for name, energy in snapshot["energies"].items():
+        bpy.data.objects[name].data.animation_data_clear()
+        bpy.data.objects[name].data.energy = energy
+    for name, value in snapshot["settings"].items():
+        setattr(bpy.context.scene.cycles, name, value)
+    for name, value in snapshot["eevee_settings"].items():
+        setattr(bpy.context.scene.eevee, name, value)
+
+    bpy.context.scene.frame_set(1)
+
+
+def setup_rendering(scene_config: dict[str, Any], load: bool = True) -> None:
+    """Sets all Blender parameters used for rendering.
+
+    Args:
+        scene_config: The configuration of the scene following the arguments
+            documented in cyclist/utility/parse_scene_config
+        load: Whether to load the base scene and materials, which can be skipped if they are loaded already
+    """
+
+    # Load base scene and materials
+    if load:
+        load_base_scene(scene_config)
+
     # Set engine and viewport parameters
-    bpy.context.scene.render.engine = "CYCLES"
+    tier = QUALITY_TIERS[scene_config.get("quality", "final")]
+    bpy.context.scene.render.engine = tier["engine"]
     bpy.context.scene.render.filepath = (
         scene_config["video_directory"] + "/" + scene_config["video_file"]
     )
     bpy.context.scene.render.resolution_x = scene_config["resolution_width"]
     bpy.context.scene.render.resolution_y = scene_config["resolution_height"]
-    bpy.context.scene.render.resolution_percentage = 100
+    bpy.context.scene.render.resolution_percentage = tier["resolution_percentage"]
+    if scene_config.get("render_threads", 0) > 0:
+        bpy.context.scene.render.threads_mode = "FIXED"
+        bpy.context.scene.render.threads = scene_config["render_threads"]
+    else:
+        bpy.context.scene.render.threads_mode = "AUTO"
     bpy.context.scene.frame_start = 1
     bpy.context.scene.frame_end = int(scene_config["fps"] * scene_config["duration"])
     bpy.context.scene.render.fps = scene_config["fps"]
@@ -51,6 +170,11 @@ def setup_rendering(scene_config: dict[str, Any]) -> None:
     bpy.context.scene.render.ffmpeg.video_bitrate = 6000
     bpy.context.scene.render.ffmpeg.ffmpeg_preset = "BEST"
 
+    # Alternatively write single frames, which are encoded outside of Blender
+    if scene_config.get("frame_format", "FFMPEG") in FRAME_EXTENSIONS:
+        bpy.context.scene.render.image_settings.file_format = scene_config["frame_format"]
+        bpy.context.scene.render.filepath = os.path.join(get_frame_directory(scene_config), "####")
+
     # Set rendering parameters
     bpy.data.worlds["World"].cycles.sample_as_light = True
     bpy.context.scene.cycles.blur_glossy = 2.0
@@ -64,6 +188,22 @@ def setup_rendering(scene_config: dict[str, Any]) -> None:
     ]
     bpy.context.scene.sync_mode = "AUDIO_SYNC"
 
+    # Trade fidelity for speed in lower quality tiers
+    if tier["samples"] is not None:
+        bpy.context.scene.cycles.samples = tier["samples"]
+        bpy.context.scene.eevee.taa_render_samples = tier["samples"]
+    if tier["max_bounces"] is not None:
+        bpy.context.scene.cycles.max_bounces = tier["max_bounces"]
+    noise_threshold = scene_config.get("noise_threshold")
+    if noise_threshold is None:
+        noise_threshold = tier["noise_threshold"]
+    if noise_threshold is not None:
+        bpy.context.scene.cycles.use_adaptive_sampling = True
+        bpy.context.scene.cycles.adaptive_threshold = noise_threshold
+
+    # Keep geometry, BVHs and shaders between frames, only animated objects are synchronized again
+    bpy.context.scene.render.use_persistent_data = not scene_config.get("no_persistent_data", False)
+
     # Set render device
     if scene_config["device"] != "CPU":
         bpy.context.scene.cycles.device = "GPU"
@@ -103,7 +243,9 @@ def apply_jitter(scene_config: dict[str, Any]) -> None:
             documented in cyclist/utility/parse_scene_config
     """
 
-    add_jitter = lambda jitter: 2.0 * jitter * (np.random.random() - 0.5)
+    # Renders are reproducible since the jitter has its own stream of the scene
+    rng = RandomStreams(scene_config["seed"], scene_config["scene_index"]).get("jitter")
+    add_jitter = lambda jitter: 2.0 * jitter * (rng.random() - 0.5)
 
     for i in range(3):
         bpy.data.objects["Camera"].location[i] += add_jitter(
@@ -120,6 +262,90 @@ def apply_jitter(scene_config: dict[str, Any]) -> None:
         )
 
 
+def interpolation_value(interpolation: str) -> int:
+    """Looks up the value of a keyframe interpolation type for bulk assignment.
+
+    Args:
+        interpolation: The interpolation type, e.g., LINEAR
+
+    Returns:
+        The integer value Blender uses to store the interpolation type
+    """
+
+    return bpy.types.Keyframe.bl_rna.properties["interpolation"].enum_items[interpolation].value
+
+
+def get_fcurve(datablock, data_path: str, index: int = 0):
+    """Gets the fcurve animating a property, creating it if needed.
+
+    Args:
+        datablock: The blender data owning the animated property, e.g., an object or light
+        data_path: The path of the property relative to the datablock, e.g., location
+        index: The index of the property, e.g., 0 for the x-coordinate of a location
+
+    Returns:
+        The fcurve of the property
+    """
+
+    if datablock.animation_data is None:
+        datablock.animation_data_create()
+    if datablock.animation_data.action is None:
+        datablock.animation_data.action = bpy.data.actions.new(name=f"{datablock.name}Action")
+
+    fcurves = datablock.animation_data.action.fcurves
+    fcurve = fcurves.find(data_path, index=index)
+    if fcurve is None:
+        fcurve = fcurves.new(data_path, index=index)
+
+    return fcurve
+
+
+def insert_keyframes(
+    datablock,
+    data_path: str,
+    frames: np.ndarray,
+    values: np.ndarray,
+    index: int = 0,
+    interpolation: str = "LINEAR",
+) -> None:
+    """Inserts many keyframes at once by filling the fcurve directly.
+
+    This avoids calling operators and keyframe_insert for each frame.
+
+    Args:
+        datablock: The blender data owning the animated property, e.g., an object or light
+        data_path: The path of the property relative to the datablock, e.g., location
+        frames: The Blender frames to insert keyframes at
+        values: The value of the property at each frame
+        index: The index of the property, e.g., 0 for the x-coordinate of a location
+        interpolation: The interpolation type of the inserted keyframes
+    """
+
+    fcurve = get_fcurve(datablock, data_path, index)
+
+    # Keep existing keyframes and add the new ones behind them
+    number_of_keyframes = len(fcurve.keyframe_points)
+    coordinates = np.empty(2 * number_of_keyframes, dtype=np.float32)
+    fcurve.keyframe_points.foreach_get("co", coordinates)
+    interpolations = np.empty(number_of_keyframes, dtype=np.int32)
+    fcurve.keyframe_points.foreach_get("interpolation", interpolations)
+
+    fcurve.keyframe_points.add(len(frames))
+    fcurve.keyframe_points.foreach_set(
+        "co",
+        np.concatenate([coordinates, np.stack([frames, values], axis=-1).ravel()]).astype(np.float32),
+    )
+    fcurve.keyframe_points.foreach_set(
+        "interpolation",
+        np.concatenate(
+            [interpolations, np.full(len(frames), interpolation_value(interpolation), dtype=np.int32)]
+        ),
+    )
+
+    # Sort keyframes and recompute their handles
+    fcurve.update()
+
+
 def set_interpolation_to_linear(bpy_obj):
     """Sets the interpolation type for all keyframes of an object to be linear.
 
@@ -127,18 +353,23 @@ def set_interpolation_to_linear(bpy_obj):
         bpy_obj: The blender object data
     """
 
-    if bpy_obj.animation_data:
+    # Objects that only orbit are moved by drivers and have no action
+    if bpy_obj.animation_data and bpy_obj.animation_data.action:
+        linear = interpolation_value("LINEAR")
         for fcurve in bpy_obj.animation_data.action.fcurves:
-            for keyframe in fcurve.keyframe_points:
-                keyframe.interpolation = "LINEAR"
+            fcurve.keyframe_points.foreach_set(
+                "interpolation", np.full(len(fcurve.keyframe_points), linear, dtype=np.int32)
+            )
+            fcurve.update()
 
 
-def apply_recolor_cycle(bpy_obj, obj: dict[str, Any]) -> None:
+def apply_recolor_cycle(bpy_obj, obj: dict[str, Any], scene_config: dict[str, Any]) -> None:
     """Applies a color change cycle to an object.
 
     Args:
         bpy_obj: The blender object data
         obj: The CycliST object data as dict
+        scene_config: The configuration of the scene
     """
 
     # Get material nodes to insert changes
@@ -146,97 +377,130 @@ def apply_recolor_cycle(bpy_obj, obj: dict[str, Any]) -> None:
     bsdf_node = material.node_tree.nodes["Group"]
     color_node = bsdf_node.inputs["Color"]
 
-    # Insert periodic keyframes for color
-    for state in obj["cycles"]["recolor"]["states"]:
-        color_node.default_value = scene_config["colors"][state["color"]]
-        color_node.keyframe_insert(data_path="default_value", frame=state["frame"])
+    # Consecutive cycles share their boundary state
+    states = {state["frame"]: state["color"] for state in obj["cycles"]["recolor"]["states"]}
+    frames = np.array(list(states.keys()))
+    colors = np.array([scene_config["colors"][color] for color in states.values()])
 
+    # Insert periodic keyframes for color, eased as when they were keyed one by one
+    data_path = color_node.path_from_id("default_value")
+    for channel in range(colors.shape[1]):
+        insert_keyframes(
+            material.node_tree, data_path, frames, colors[:, channel], channel, "BEZIER"
+        )
 
-def apply_rotate_cycle(bpy_obj, obj: dict[str, Any]) -> None:
+
+def apply_rotate_cycle(bpy_obj, obj: dict[str, Any], scene_config: dict[str, Any]) -> None:
     """Applies a rotation cycle to an object.
 
     Args:
         bpy_obj: The blender object data
         obj: The CycliST object data as dict
+        scene_config: The configuration of the scene
     """
 
-    # Insert periodic keyframes for color
-    base_rotation = bpy_obj.rotation_euler.copy()
-    for state in obj["cycles"]["rotate"]["states"]:
-        bpy_obj.rotation_euler = (
-            base_rotation[0] + state["rotation"][0],
-            base_rotation[1] + state["rotation"][1],
-            base_rotation[2] + state["rotation"][2],
-        )
-        bpy_obj.keyframe_insert(data_path="rotation_euler", frame=state["frame"])
+    # Key the first cycle's boundaries and let Blender extrapolate linearly,
+    # which matches the periodic rotation since a full cycle is a full turn
+    period = obj["cycles"]["rotate"]["period"]
+    frames = np.array([0, period])
+    angle_per_frame = CycleTrajectory(obj).rotation([1])[0]
+    rotations = np.array(bpy_obj.rotation_euler) + frames[:, None] * angle_per_frame
+    for axis in range(3):
+        insert_keyframes(bpy_obj, "rotation_euler", frames + 1, rotations[:, axis], axis)
+        get_fcurve(bpy_obj, "rotation_euler", axis).extrapolation = "LINEAR"
 
 
-def apply_resize_cycle(bpy_obj, obj: dict[str, Any]) -> None:
+def apply_resize_cycle(bpy_obj, obj: dict[str, Any], scene_config: dict[str, Any]) -> None:
     """Applies a resize cycle to an object.
 
     Args:
         bpy_obj: The blender object data
         obj: The CycliST object data as dict
+        scene_config: The configuration of the scene
     """
 
-    # Insert periodic keyframes for size
+    # Keyframes at the start, middle and end of each cycle, consecutive cycles share their boundary
+    frames = np.unique([state["frame"] for state in obj["cycles"]["resize"]["states"]])
+    sizes = CycleTrajectory(obj).size(frames - 1, scene_config["sizes"])
     size = scene_config["sizes"][obj["size"]]
-    for state in obj["cycles"]["resize"]["states"]:
-        bpy.ops.transform.resize(
-            value=(state["factor"], state["factor"], state["factor"])
-        )
-        if state["factor"] < 1.0:
-            bpy.ops.transform.translate(value=(0.0, 0.0, state["factor"] * size - size))
-            last_offset = state["factor"] * size - size
-        elif state["factor"] > 1.0:
-            bpy.ops.transform.translate(value=(0.0, 0.0, -last_offset))
 
-        bpy_obj.keyframe_insert(data_path="scale", frame=state["frame"])
-        bpy_obj.keyframe_insert(data_path="location", index=2, frame=state["frame"])
+    # Scale relative to the initial size and move along so that the object stays on the ground
+    scales = np.array(bpy_obj.scale)[None, :] * (sizes / size)[:, None]
+    heights = bpy_obj.location[2] + sizes - size
 
+    # Insert periodic keyframes for size
+    for axis in range(3):
+        insert_keyframes(bpy_obj, "scale", frames, scales[:, axis], axis)
+    insert_keyframes(bpy_obj, "location", frames, heights, 2)
 
-def apply_linear_cycle(bpy_obj, obj: dict[str, Any]) -> None:
-    """Applies a linear motion cycle to an object.
+
+def apply_location_cycle(bpy_obj, obj: dict[str, Any], scene_config: dict[str, Any]) -> None:
+    """Inserts a keyframe for each frame following the (x, y) locations of a moving object.
 
     Args:
         bpy_obj: The blender object data
         obj: The CycliST object data as dict
+        scene_config: The configuration of the scene
     """
 
     # Insert periodic keyframes for location
-    for state in obj["cycles"]["linear"]["states"]:
-        last_position = bpy_obj.location.copy()
-        bpy.ops.transform.translate(
-            value=(
-                state["location"]["x"] - last_position[0],
-                state["location"]["y"] - last_position[1],
-                0.0,
-            )
-        )
-        bpy_obj.keyframe_insert(data_path="location", index=0, frame=state["frame"])
-        bpy_obj.keyframe_insert(data_path="location", index=1, frame=state["frame"])
+    frames = np.arange(int(scene_config["fps"] * scene_config["duration"]))
+    locations = CycleTrajectory(obj, scene_config["objects"]).location(frames)
+    for axis in range(2):
+        insert_keyframes(bpy_obj, "location", frames + 1, locations[:, axis], axis)
 
 
-def apply_orbit_cycle(bpy_obj, obj: dict[str, Any]) -> None:
+def apply_linear_cycle(bpy_obj, obj: dict[str, Any], scene_config: dict[str, Any]) -> None:
     """Applies a linear motion cycle to an object.
 
     Args:
         bpy_obj: The blender object data
         obj: The CycliST object data as dict
+        scene_config: The configuration of the scene
     """
 
-    # Insert periodic keyframes for location
-    for state in obj["cycles"]["orbit"]["states"]:
-        last_position = bpy_obj.location.copy()
-        bpy.ops.transform.translate(
-            value=(
-                state["location"]["x"] - last_position[0],
-                state["location"]["y"] - last_position[1],
-                0.0,
-            )
+    # Key the turning points of a single cycle and let Blender repeat it
+    period = obj["cycles"]["linear"]["period"]
+    frames = np.array([0.0, period / 2.0, period])
+    locations = CycleTrajectory(obj).location(frames)
+    for axis in range(2):
+        insert_keyframes(bpy_obj, "location", frames + 1, locations[:, axis], axis)
+        get_fcurve(bpy_obj, "location", axis).modifiers.new("CYCLES")
+
+
+def apply_orbit_cycle(bpy_obj, obj: dict[str, Any], scene_config: dict[str, Any]) -> None:
+    """Applies an orbit motion cycle to an object.
+
+    Args:
+        bpy_obj: The blender object data
+        obj: The CycliST object data as dict
+        scene_config: The configuration of the scene
+    """
+
+    # Scene configs only listing the locations of each frame are keyed frame by frame
+    orbit = obj["cycles"]["orbit"]
+    if "radius" not in orbit:
+        apply_location_cycle(bpy_obj, obj, scene_config)
+        return
+
+    # Drive the location by the center's location and the orbit's angle at the current frame
+    # Since the angle increases by a full turn each period, the period itself can be left out
+    center = scene_config["objects"][obj["center"]]
+    center_bpy_obj = bpy.data.objects[f"{center['mesh']}_{obj['center']}"]
+    for axis, function in enumerate(("cos", "sin")):
+        driver = bpy_obj.driver_add("location", axis).driver
+        driver.type = "SCRIPTED"
+
+        variable = driver.variables.new()
+        variable.name = "center"
+        variable.type = "SINGLE_PROP"
+        variable.targets[0].id = center_bpy_obj
+        variable.targets[0].data_path = f"location[{axis}]"
+
+        driver.expression = (
+            f"center + {orbit['radius']!r} * "
+            f"{function}({orbit['initial_angle']!r} + {orbit['angle_increment']!r} * (frame - 1))"
         )
-        bpy_obj.keyframe_insert(data_path="location", index=0, frame=state["frame"])
-        bpy_obj.keyframe_insert(data_path="location", index=1, frame=state["frame"])
 
 
 def apply_light_cycle(scene_config: dict[str, Any]) -> None:
@@ -247,42 +511,73 @@ def apply_light_cycle(scene_config: dict[str, Any]) -> None:
             documented in cyclist/utility/parse_scene_config
     """
 
-    # Store initial power levels to set intensity over time relative to origin
-    original_key_power = bpy.data.objects["Lamp_Key"].data.energy
-    original_back_power = bpy.data.objects["Lamp_Back"].data.energy
-    original_fill_power = bpy.data.objects["Lamp_Fill"].data.energy
-    original_area_power = bpy.data.objects["Area"].data.energy
+    # The intensity follows a cosine, which Blender generates without any keyframes
+    frequency = 2.0 * np.pi / scene_config["lights"]["period"]
+    for name in LIGHTS:
+        light = bpy.data.objects[name].data
+        modifier = get_fcurve(light, "energy").modifiers.new("FNGENERATOR")
+        modifier.function_type = "COS"
+        modifier.amplitude = 0.5 * light.energy
+        modifier.value_offset = 0.5 * light.energy
+        modifier.phase_multiplier = frequency
+        modifier.phase_offset = -frequency
 
-    # Insert periodic keyframes for location
-    for state in scene_config["lights"]["states"]:
-        bpy.data.objects["Lamp_Key"].data.energy = original_key_power * state["intensity"]
-        bpy.data.objects["Lamp_Key"].data.keyframe_insert("energy", frame=state["frame"])
-        bpy.data.objects["Lamp_Back"].data.energy = original_back_power * state["intensity"]
-        bpy.data.objects["Lamp_Back"].data.keyframe_insert("energy", frame=state["frame"])
-        bpy.data.objects["Lamp_Fill"].data.energy = original_fill_power * state["intensity"]
-        bpy.data.objects["Lamp_Fill"].data.keyframe_insert("energy", frame=state["frame"])
-        bpy.data.objects["Area"].data.energy = original_area_power * state["intensity"]
-        bpy.data.objects["Area"].data.keyframe_insert("energy", frame=state["frame"])
-
-
-def apply_cycles(bpy_obj, obj: dict[str, Any]) -> None:
+
+def apply_cycles(bpy_obj, obj: dict[str, Any], scene_config: dict[str, Any]) -> None:
     """Applies all cycle of an object.
 
     Args:
         bpy_obj: The blender object data
         obj: The CycliST object data as dict
+        scene_config: The configuration of the scene
     """
 
     if "recolor" in obj["cycles"]:
-        apply_recolor_cycle(bpy_obj, obj)
+        apply_recolor_cycle(bpy_obj, obj, scene_config)
     if "rotate" in obj["cycles"]:
-        apply_rotate_cycle(bpy_obj, obj)
+        apply_rotate_cycle(bpy_obj, obj, scene_config)
     if "resize" in obj["cycles"]:
-        apply_resize_cycle(bpy_obj, obj)
+        apply_resize_cycle(bpy_obj, obj, scene_config)
     if "linear" in obj["cycles"]:
-        apply_linear_cycle(bpy_obj, obj)
+        apply_linear_cycle(bpy_obj, obj, scene_config)
     if "orbit" in obj["cycles"]:
-        apply_orbit_cycle(bpy_obj, obj)
+        apply_orbit_cycle(bpy_obj, obj, scene_config)
+
+
+def create_material(name: str, material_name: str, color: str, scene_config: dict[str, Any]):
+    """Creates a material from one of the loaded material node groups.
+
+    Args:
+        name: The name of the new material
+        material_name: The name of the node group, e.g., Rubber
+        color: The name of the material's color
+        scene_config: The configuration of the scene
+
+    Returns:
+        The blender material
+    """
+
+    material = bpy.data.materials.new(name=name)
+    material.use_nodes = True
+
+    # Set the materials nodes default color and output edge
+    group_node = material.node_tree.nodes.new("ShaderNodeGroup")
+    group_node.node_tree = bpy.data.node_groups[material_name]
+
+    for node in group_node.inputs:
+        if node.name == "Color":
+            node.default_value = scene_config["colors"][color]
+            break
+
+    for node in material.node_tree.nodes:
+        if node.name == "Material Output":
+            material.node_tree.links.new(
+                group_node.outputs["Shader"],
+                node.inputs["Surface"],
+            )
+            break
+
+    return material
 
 
 def add_objects(scene_config: dict[str, Any]) -> None:
@@ -293,6 +588,9 @@ def add_objects(scene_config: dict[str, Any]) -> None:
             documented in cyclist/utility/parse_scene_config
     """
 
+    # Objects without recolor cycles share a material per material and color, which leaves fewer shaders to compile
+    shared_materials = {}
+
     for i, obj in enumerate(scene_config["objects"]):
         # Insert object mesh into scene
         filename = os.path.join(
@@ -323,31 +621,24 @@ def add_objects(scene_config: dict[str, Any]) -> None:
         if "cycles" in obj.keys() and "rotate" in obj["cycles"].keys():
             bpy.ops.transform.translate(value=(0.0, 0.0, size * 0.25))
 
-        # Set its initial material and color
-        material = bpy.data.materials.new(name=f"{name}_material")
-        material.use_nodes = True
-        bpy_obj.data.materials.append(material)
-
-        # Set the materials nodes default color and output edge
-        group_node = material.node_tree.nodes.new("ShaderNodeGroup")
-        group_node.node_tree = bpy.data.node_groups[obj["material"]]
-
-        for node in group_node.inputs:
-            if node.name == "Color":
-                node.default_value = scene_config["colors"][obj["color"]]
-                break
-
-        for node in material.node_tree.nodes:
-            if node.name == "Material Output":
-                material.node_tree.links.new(
-                    group_node.outputs["Shader"],
-                    node.inputs["Surface"],
+        # Set its initial material and color, only keyframed colors require a material of its own
+        if "recolor" in obj.get("cycles", {}):
+            material = create_material(f"{name}_material", obj["material"], obj["color"], scene_config)
+        else:
+            key = (obj["material"], obj["color"])
+            if key not in shared_materials:
+                shared_materials[key] = create_material(
+                    f"{obj['material']}_{obj['color']}_material", obj["material"], obj["color"], scene_config
                 )
-                break
+            material = shared_materials[key]
+        bpy_obj.data.materials.append(material)
 
         # Apply cycles and ensure interpolation is linear
-        if "cycles" in obj.keys():
-            apply_cycles(bpy_obj, obj)
+        # Static objects carry no animation data, so that their render data is kept across frames
+        if obj.get("cycles"):
+            apply_cycles(bpy_obj, obj, scene_config)
+        else:
+            bpy_obj.animation_data_clear()
         set_interpolation_to_linear(bpy_obj)
 
 
@@ -373,16 +664,67 @@ def compute_directions(scene_config: dict[str, Any]) -> None:
     return behind, left, up
 
 
-def render(scene_config: dict[str, Any]) -> None:
+def calibrate_samples(time_budget: float, number_of_frames: int) -> int:
+    """Picks the number of samples per frame to render all frames within a time budget.
+
+    The first frame is rendered with a few samples to estimate the fixed time per frame and the time per sample.
+    The budget only lowers the samples, never beyond the ones configured by the quality tier.
+
+    Args:
+        time_budget: The wall-clock time in seconds for rendering, including the calibration
+        number_of_frames: The number of frames to render
+
+    Returns:
+        The number of samples, at least one
+    """
+
+    start = time()
+    maximum_samples = bpy.context.scene.cycles.samples
+    bpy.context.scene.frame_set(bpy.context.scene.frame_start)
+
+    calibration_times = []
+    for samples in CALIBRATION_SAMPLES:
+        bpy.context.scene.cycles.samples = samples
+        calibration_start = time()
+        bpy.ops.render.render(write_still=False)
+        calibration_times.append(time() - calibration_start)
+
+    # The first render also synchronizes the scene, which overestimates the time per sample
+    time_per_sample = max(
+        (calibration_times[0] - calibration_times[1]) / (CALIBRATION_SAMPLES[0] - CALIBRATION_SAMPLES[1]),
+        1e-3,
+    )
+    time_per_frame = max(calibration_times[1] - CALIBRATION_SAMPLES[1] * time_per_sample, 0.0)
+    remaining_time = time_budget - (time() - start)
+    samples = int((remaining_time / number_of_frames - time_per_frame) / time_per_sample)
+
+    return min(max(samples, 1), maximum_samples)
+
+
+def render(
+    scene_config: dict[str, Any],
+    directions: tuple | None = None,
+    frame_chunk: tuple[int, int] | None = None,
+    samples: int | None = None,
+    calibrate: bool = False,
+) -> int | None:
     """Renders a scene using Blender.
 
     Args:
         scene_config: The configuration of the scene following the arguments
             documented in cyclist/utility/parse_scene_config
+        directions: The direction vectors (behind, left, up) if the base scene has already been loaded
+        frame_chunk: The index of this process and the number of processes splitting the scene's frames among them,
+            where only the first one writes the scene configuration
+        samples: The number of samples per frame calibrated for all chunks, which skips calibrating again
+        calibrate: Whether to only calibrate the samples for the largest of the chunks instead of rendering
+
+    Returns:
+        The calibrated number of samples if only calibrating, None otherwise
     """
 
     # Get direction vectors in this scene
-    behind, left, up = compute_directions(scene_config)
+    behind, left, up = directions if directions is not None else compute_directions(scene_config)
     scene_config["directions"] = {}
     scene_config["directions"]["behind"] = tuple(behind)
     scene_config["directions"]["front"] = tuple(-behind)
@@ -392,7 +734,7 @@ def render(scene_config: dict[str, Any]) -> None:
     scene_config["directions"]["below"] = tuple(-up)
 
     # Setup scene for rendering
-    setup_rendering(scene_config)
+    setup_rendering(scene_config, load=directions is None)
 
     # Setup lighting
     apply_jitter(scene_config)
@@ -405,16 +747,68 @@ def render(scene_config: dict[str, Any]) -> None:
             scene_config
         )
 
-    # Render video with Blender
-    bpy.ops.ptcache.free_bake_all()
-    bpy.ops.ptcache.bake_all()
+    # Only ray-trace a single period of the whole scene if it repeats within the video
+    # Frames are looped when encoding them, a video rendered by Blender is looped with ffmpeg
+    number_of_frames = int(scene_config["fps"] * scene_config["duration"])
+    rendering_video = scene_config.get("frame_format", "FFMPEG") not in FRAME_EXTENSIONS
+    scene_config["rendered_frames"] = number_of_frames
+    if not scene_config.get("render_all_frames", False) and (not rendering_video or ffmpeg_available()):
+        scene_config["rendered_frames"] = hyperperiod(scene_config)
+        bpy.context.scene.frame_end = scene_config["rendered_frames"]
+
+    video_path = scene_config["video_directory"] + "/" + scene_config["video_file"]
+    period_path = os.path.splitext(video_path)[0] + "_period.mp4"
+    looping_video = rendering_video and scene_config["rendered_frames"] < number_of_frames
+    if looping_video:
+        bpy.context.scene.render.filepath = period_path
+
+    # Only render a contiguous part of the frames, the rest is rendered by other processes
+    if frame_chunk is not None:
+        chunk_index, number_of_chunks = frame_chunk
+        bpy.context.scene.frame_start = 1 + chunk_index * scene_config["rendered_frames"] // number_of_chunks
+        bpy.context.scene.frame_end = (chunk_index + 1) * scene_config["rendered_frames"] // number_of_chunks
+
+    # Render video with Blender, with as many samples as fit into the time budget
+    # A chunk is empty if there are fewer frames than processes, and then renders nothing
+    number_of_rendered_frames = bpy.context.scene.frame_end - bpy.context.scene.frame_start + 1
+    if number_of_rendered_frames > 0:
+        bpy.ops.ptcache.free_bake_all()
+        bpy.ops.ptcache.bake_all()
+    calibrating = scene_config.get("time_budget") is not None and bpy.context.scene.render.engine == "CYCLES"
+
+    # Chunks render with the samples calibrated once beforehand, so that all frames of the video look alike
+    if calibrate:
+        if calibrating:
+            number_of_chunks = frame_chunk[1] if frame_chunk is not None else 1
+            largest_chunk = -(-scene_config["rendered_frames"] // number_of_chunks)
+            bpy.context.scene.cycles.samples = calibrate_samples(scene_config["time_budget"], largest_chunk)
+        return bpy.context.scene.cycles.samples
+
     start = time()
-    bpy.ops.render.render(animation=True)
-    scene_config["render_time"] = time() - start
+    frame_render_time = 0.0
+    if number_of_rendered_frames > 0:
+        if samples is not None:
+            bpy.context.scene.cycles.samples = samples
+        elif calibrating:
+            bpy.context.scene.cycles.samples = calibrate_samples(scene_config["time_budget"], number_of_rendered_frames)
+        frames_start = time()
+        bpy.ops.render.render(animation=True)
+        frame_render_time = (time() - frames_start) / number_of_rendered_frames
+    scene_config["samples"] = bpy.context.scene.cycles.samples
+
+    # Repeat the rendered period to the full length of the video, the scene is not rendered if that fails
     scene_config["rendered"] = True
+    if looping_video:
+        scene_config["rendered"] = loop_video(
+            period_path, video_path, number_of_frames // scene_config["rendered_frames"]
+        )
+    scene_config["render_time"] = time() - start
+    scene_config["frame_render_time"] = frame_render_time
+    if frame_chunk is not None and frame_chunk[0] > 0:
+        return
 
     # Optionally store .blend file
-    if scene_config["write_blendfile"]:
+    if scene_config["write_blendfile"] and scene_config["rendered"]:
         blend_file_path = os.path.join(
             scene_config["blendfile_path"], scene_config["blend_file"]
         )
@@ -430,6 +824,44 @@ def render(scene_config: dict[str, Any]) -> None:
         json.dump(scene_config, scene_config_file, indent=2)
 
 
+def serve() -> None:
+    """Renders the scene configurations whose paths are read line by line from standard input.
+
+    The base scene and materials are only loaded once and reset to their original state between
+    scenes. After each scene, a line starting with RENDERED or FAILED followed by its path is printed.
+    """
+
+    # Directions are computed before loading the base scene, just as for a single scene
+    directions = compute_directions(None)
+    loaded, snapshot = None, None
+
+    for line in sys.stdin:
+        scene_config_path = line.strip()
+        if not scene_config_path:
+            continue
+
+        try:
+            with open(scene_config_path, "r") as scene_config_file:
+                scene_config = json.load(scene_config_file)
+
+            # Only load the base scene again if another one is requested
+            base_scene = (scene_config["base_scene_path"], scene_config["material_directory"])
+            if base_scene != loaded:
+                load_base_scene(scene_config)
+                loaded, snapshot = base_scene, snapshot_scene()
+            else:
+                reset_scene(snapshot)
+
+            render(scene_config, directions)
+            print(f"{RENDERED} {scene_config_path}", flush=True)
+        except Exception:
+            traceback.print_exc()
+            print(f"{FAILED} {scene_config_path}", flush=True)
+
+            # Start from a freshly loaded base scene after a failure
+            loaded = None
+
+
 if __name__ == "__main__":
     # Check if running in Blender environment and getting scene_config
     try:
@@ -437,15 +869,27 @@ if __name__ == "__main__":
         import bpy, bpy_extras
         from mathutils import Vector
 
-        # Inside blender, we only consider the scene configuration path after '-- --scene_config '
-        scene_config_path = sys.argv[-1].split(" ")[-1]
+        # Inside blender, we only consider the arguments after '--'
+        parser = argparse.ArgumentParser()
+        parser.add_argument("--scene_config", type=str)
+        parser.add_argument("--serve", action="store_true")
+        parser.add_argument("--frame_chunk", nargs=2, type=int, default=None)
+        parser.add_argument("--samples", type=int, default=None)
+        parser.add_argument("--calibrate", action="store_true")
+        args = parser.parse_args(sys.argv[sys.argv.index("--") + 1:])
     except ImportError:
         print(
             "Running cyclist/scene/renderer.py as main file outside of Blender does not work."
         )
         exit(1)
 
-    # Render scene as described in config and end
-    with open(scene_config_path, "r") as scene_config_file:
-        scene_config = json.load(scene_config_file)
-        render(scene_config)
+    # Keep rendering scenes as they come in, or render scene as described in config and end
+    if args.serve:
+        serve()
+    else:
+        with open(args.scene_config, "r") as scene_config_file:
+            scene_config = json.load(scene_config_file)
+            if args.calibrate:
+                print(f"{CALIBRATED} {render(scene_config, frame_chunk=args.frame_chunk, calibrate=True)}", flush=True)
+            else:
+                render(scene_config, frame_chunk=args.frame_chunk, samples=args.samples)
@@ -0,0 +1,168 @@
+"""This file contains the PlacementSampler, proposing object locations only from free space in the scene."""
+
+# Standard Library
+from typing import Any
+
+# Third Party
+import numpy as np
+
+
+class PlacementSampler:
+    """Samples candidate locations from the space not swept by already placed objects.
+
+    The scene's region is divided into a grid of square cells. Whenever an object is placed,
+    all cells whose center lies within the minimum distance of any location the object takes
+    throughout the video are marked as occupied. This covers static footprints as well as the
+    segments of linear cycles and the annuli of orbits. Candidates are then drawn uniformly
+    from the remaining free cells, so that the validator rarely has to reject them.
+    Orbits are instead drawn from the radii that keep the minimum distance to all placed objects.
+
+    Args:
+        scene_config: The configuration of the scene following the arguments
+            documented in cyclist/utility/parse_scene_config
+        cells_per_distance: How many grid cells span the minimum distance between objects
+    """
+
+    def __init__(self, scene_config: dict[str, Any], cells_per_distance: int = 4) -> "PlacementSampler":
+        self.minimum_distance = scene_config["minimum_distance"]
+
+        # Grid of cells covering the scene's region
+        width = scene_config["max_x"] - scene_config["min_x"]
+        height = scene_config["max_y"] - scene_config["min_y"]
+        number_of_columns = max(1, int(np.ceil(width * cells_per_distance / self.minimum_distance)))
+        number_of_rows = max(1, int(np.ceil(height * cells_per_distance / self.minimum_distance)))
+        self.cell_size = np.array([width / number_of_columns, height / number_of_rows])
+
+        x, y = np.meshgrid(
+            scene_config["min_x"] + (np.arange(number_of_columns) + 0.5) * self.cell_size[0],
+            scene_config["min_y"] + (np.arange(number_of_rows) + 0.5) * self.cell_size[1],
+            indexing="ij",
+        )
+        self.centers = np.stack([x.ravel(), y.ravel()], axis=-1)
+        self.free = np.ones(len(self.centers), dtype=bool)
+        self.trajectories = []
+        self.origin = np.array([scene_config["min_x"], scene_config["min_y"]])
+        self.shape = (number_of_columns, number_of_rows)
+
+    def reset(self) -> None:
+        """Marks the whole scene as free space again."""
+
+        self.free[:] = True
+        self.trajectories = []
+
+    def occupy(self, trajectory: np.ndarray) -> None:
+        """Marks the space swept by a placed object as occupied.
+
+        Args:
+            trajectory: The (x, y) locations of the object for each frame as array of shape (frames, 2)
+        """
+
+        self.trajectories.append(trajectory)
+
+        # Static objects or repeating cycles visit the same locations many times
+        locations = np.unique(trajectory, axis=0)
+
+        free = np.flatnonzero(self.free)
+        differences = self.centers[free, None, :] - locations[None, :, :]
+        distances = np.sum(differences**2, axis=-1)
+        self.free[free[np.any(distances < self.minimum_distance**2, axis=1)]] = False
+
+    def sample(self, rng: np.random.Generator) -> tuple[float, float] | None:
+        """Draws a location uniformly from the free space.
+
+        Args:
+            rng: The random number generator to draw from
+
+        Returns:
+            The (x, y) location, or None if no free space is left
+        """
+
+        free = np.flatnonzero(self.free)
+        if len(free) == 0:
+            return None
+
+        center = self.centers[rng.choice(free)]
+        x, y = center + (rng.uniform(size=2) - 0.5) * self.cell_size
+
+        return float(x), float(y)
+
+    def free_radii(
+        self,
+        center: np.ndarray,
+        directions: np.ndarray,
+        minimum_radius: float,
+        maximum_radius: float,
+    ) -> np.ndarray:
+        """Computes the radii of orbits around a center that keep the minimum distance to all placed objects.
+
+        At each frame, a placed object blocks the radii for which the orbiting object would come closer
+        than the minimum distance, which is a single interval given by the roots of a quadratic in the radius.
+        The free radii are what remains of [minimum_radius, maximum_radius] after removing all blocked intervals.
+
+        Args:
+            center: The (x, y) locations of the orbit's center for each frame as array of shape (frames, 2)
+            directions: The unit vectors from the center to the orbiting object for each frame as array of shape (frames, 2)
+            minimum_radius: The smallest allowed radius
+            maximum_radius: The largest allowed radius
+
+        Returns:
+            The free radii as disjoint intervals in an array of shape (intervals, 2)
+        """
+
+        # Offsets of all placed objects from the center, shape (objects, frames, 2)
+        offsets = np.stack(self.trajectories) - center[None, :, :]
+        projections = np.sum(offsets * directions[None, :, :], axis=-1)
+        discriminants = projections**2 - np.sum(offsets**2, axis=-1) + self.minimum_distance**2
+
+        blocked = discriminants > 0.0
+        roots = np.sqrt(discriminants[blocked])
+        starts = projections[blocked] - roots
+        ends = projections[blocked] + roots
+        order = np.argsort(starts)
+        starts, ends = starts[order], ends[order]
+
+        # Merge the blocked intervals and collect the gaps between them
+        ends = np.maximum.accumulate(ends)
+        lower = np.concatenate([[minimum_radius], ends])
+        upper = np.concatenate([starts, [maximum_radius]])
+        lower = np.maximum(lower, minimum_radius)
+        upper = np.minimum(upper, maximum_radius)
+
+        return np.stack([lower, upper], axis=-1)[upper > lower]
+
+    def sample_orbit(
+        self,
+        directions: np.ndarray,
+        minimum_radii: np.ndarray,
+        maximum_radius: float,
+        rng: np.random.Generator,
+    ) -> tuple[int, float] | None:
+        """Draws an orbit center and radius such that the orbit keeps the minimum distance to all placed objects.
+
+        The center is drawn uniformly from all placed objects that allow for any such orbit,
+        the radius uniformly from the free radii around it.
+
+        Args:
+            directions: The unit vectors from the center to the orbiting object for each frame as array of shape (frames, 2)
+            minimum_radii: The smallest allowed radius around each placed object
+            maximum_radius: The largest allowed radius
+            rng: The random number generator to draw from
+
+        Returns:
+            The index of the center and the radius, or None if no such orbit exists
+        """
+
+        candidates = []
+        for index, center in enumerate(self.trajectories):
+            intervals = self.free_radii(center, directions, minimum_radii[index], maximum_radius)
+            if len(intervals) > 0:
+                candidates.append((index, intervals))
+
+        if len(candidates) == 0:
+            return None
+
+        index, intervals = candidates[rng.integers(len(candidates))]
+        lengths = intervals[:, 1] - intervals[:, 0]
+        lower, upper = intervals[rng.choice(len(intervals), p=lengths / np.sum(lengths))]
+
+        return index, float(rng.uniform(lower, upper))
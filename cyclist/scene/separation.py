@@ -0,0 +1,397 @@
+"""Computes the minimum distance between two objects over the whole video from their cycle parameters.
+
+Objects are static, move back and forth along a segment (linear) or orbit a static center, and these
+motions are continuous in time, just as Blender interpolates them. Pairs of such motions have closed
+forms, so no collision can happen in between two frames unnoticed. Only orbits around a moving center,
+per-frame states of old scene files and linear motions paired with orbits are sampled, where the
+distance is lowered by how far both objects can approach each other in between two samples.
+Throughout, frames are 0-based indices, i.e., frame index 0 corresponds to Blender's frame 1.
+"""
+
+# Standard Library
+from typing import Any
+import math
+
+# Third Party
+import numpy as np
+
+# CycliST
+from cyclist.scene.trajectory import CycleTrajectory
+
+# Newton steps refining the roots of the derivative of the squared distance between two orbits
+NEWTON_STEPS = 3
+
+# Largest distance two sampled objects may approach each other by unnoticed, and the most samples per frame
+SAMPLING_TOLERANCE = 0.01
+MAX_SUBSTEPS = 64
+
+
+def describe_motion(obj: dict[str, Any], objects: list[dict[str, Any]]) -> tuple | None:
+    """Describes the motion of an object in the plane by its parameters.
+
+    Args:
+        obj: The object configuration
+        objects: All objects of the scene, needed to find the center of an orbit
+
+    Returns:
+        ("static", location), ("linear", start, intermittent, period) or ("orbit", center, radius,
+        initial angle, angle increment per frame, period), or None if the motion has no closed form
+    """
+
+    cycles = obj.get("cycles", {})
+    location = np.array([obj["location"]["x"], obj["location"]["y"]], dtype=float)
+
+    if "linear" in cycles:
+        intermittent = np.array(
+            [obj["intermittent_location"]["x"], obj["intermittent_location"]["y"]], dtype=float
+        )
+        return "linear", location, intermittent, cycles["linear"]["period"]
+
+    if "orbit" in cycles:
+        orbit = cycles["orbit"]
+        if "radius" not in orbit:
+            return None
+
+        # Orbits around a moving center are chained, i.e., have no closed form
+        center = describe_motion(objects[obj["center"]], objects)
+        if center is None or center[0] != "static":
+            return None
+
+        return "orbit", center[1], orbit["radius"], orbit["initial_angle"], orbit["angle_increment"], orbit["period"]
+
+    return "static", location
+
+
+def point_to_linear(point: np.ndarray, motion: tuple) -> tuple[float, float]:
+    """Computes the minimum distance between a static point and a linear motion, which covers its whole segment.
+
+    Args:
+        point: The static location
+        motion: The linear motion as described by describe_motion
+
+    Returns:
+        The minimum distance and the first frame it is reached at
+    """
+
+    _, start, intermittent, period = motion
+    direction = intermittent - start
+    length = float(direction @ direction)
+    progress = 0.0 if length == 0.0 else min(max(float((point - start) @ direction) / length, 0.0), 1.0)
+
+    return float(np.linalg.norm(start + progress * direction - point)), progress * period / 2.0
+
+
+def linear_to_linear(first: dict[str, Any], second: dict[str, Any]) -> tuple[float, float]:
+    """Computes the minimum distance between two linear motions.
+
+    Their difference is linear in between the turning points of both, so the closest approach
+    within each of these pieces is the projection of the origin onto a segment.
+
+    Args:
+        first: The first object configuration, moving linearly
+        second: The second object configuration, moving linearly
+
+    Returns:
+        The minimum distance and the first frame it is reached at
+    """
+
+    # Both motions repeat after the least common multiple of their periods
+    first_period, second_period = first["cycles"]["linear"]["period"], second["cycles"]["linear"]["period"]
+    repetition = math.lcm(first_period, second_period)
+    breakpoints = np.unique(
+        np.concatenate(
+            [
+                np.arange(0.0, repetition + 1e-9, first_period / 2.0),
+                np.arange(0.0, repetition + 1e-9, second_period / 2.0),
+            ]
+        )
+    )
+
+    differences = CycleTrajectory(first).location(breakpoints) - CycleTrajectory(second).location(breakpoints)
+    starts, ends = differences[:-1], differences[1:]
+    velocities = ends - starts
+    squared_speeds = np.sum(velocities**2, axis=-1)
+
+    # Closest approach to the origin along each piece
+    progress = np.clip(
+        -np.sum(starts * velocities, axis=-1) / np.where(squared_speeds > 0.0, squared_speeds, 1.0), 0.0, 1.0
+    )
+    distances = np.linalg.norm(starts + progress[:, None] * velocities, axis=-1)
+    piece = int(np.argmin(distances))
+
+    return float(distances[piece]), float(
+        breakpoints[piece] + progress[piece] * (breakpoints[piece + 1] - breakpoints[piece])
+    )
+
+
+def point_to_orbit(point: np.ndarray, motion: tuple) -> tuple[float, float]:
+    """Computes the minimum distance between a static point and an orbit, which covers its whole circle.
+
+    Args:
+        point: The static location
+        motion: The orbit as described by describe_motion
+
+    Returns:
+        The minimum distance and the first frame it is reached at
+    """
+
+    _, center, radius, initial_angle, angle_increment, period = motion
+    offset = point - center
+    angle = math.atan2(offset[1], offset[0])
+
+    return abs(float(np.linalg.norm(offset)) - radius), ((angle - initial_angle) / angle_increment) % period
+
+
+def orbit_to_orbit(first: tuple, second: tuple) -> tuple[float, float]:
+    """Computes the minimum distance between two orbits around static centers.
+
+    With z = exp(i 2 pi t / L), L being the least common multiple of both periods, the squared distance
+    is a trigonometric polynomial in z. Its extrema are the roots of its derivative on the unit circle.
+
+    Args:
+        first: The first orbit as described by describe_motion
+        second: The second orbit as described by describe_motion
+
+    Returns:
+        The minimum distance and the first frame it is reached at
+    """
+
+    _, first_center, first_radius, first_angle, first_increment, first_period = first
+    _, second_center, second_radius, second_angle, second_increment, second_period = second
+    repetition = math.lcm(first_period, second_period)
+    base_frequency = 2.0 * np.pi / repetition
+
+    # Difference as sum of terms a * z^k, i.e., the offset of the centers and both circles
+    terms = [
+        (complex(*(first_center - second_center)), 0),
+        (first_radius * np.exp(1j * first_angle), round(first_increment / base_frequency)),
+        (-second_radius * np.exp(1j * second_angle), round(second_increment / base_frequency)),
+    ]
+
+    # Squared distance as sum of c_m * z^m, from the products of all terms with the conjugates of all terms
+    coefficients = {}
+    for a, k in terms:
+        for b, l in terms:
+            coefficients[k - l] = coefficients.get(k - l, 0.0) + a * np.conj(b)
+    degree = max(abs(m) for m in coefficients)
+
+    def derivatives(times: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        first_derivative, second_derivative = 0.0, 0.0
+        for m, c in coefficients.items():
+            term = c * np.exp(1j * m * base_frequency * times)
+            first_derivative = first_derivative + (1j * m * base_frequency * term).real
+            second_derivative = second_derivative - (m * base_frequency) ** 2 * term.real
+        return first_derivative, second_derivative
+
+    # Candidates are the roots of the derivative times z^degree, refined on the unit circle
+    candidates = np.zeros(1)
+    if degree > 0:
+        polynomial = np.zeros(2 * degree + 1, dtype=complex)
+        for m, c in coefficients.items():
+            polynomial[degree - m] = 1j * m * c
+        roots = np.roots(polynomial)
+        candidates = np.concatenate([candidates, np.angle(roots) / base_frequency])
+        for _ in range(NEWTON_STEPS):
+            first_derivative, second_derivative = derivatives(candidates)
+            steps = first_derivative / np.where(second_derivative != 0.0, second_derivative, 1.0)
+            candidates = candidates - np.where(second_derivative != 0.0, steps, 0.0)
+    candidates = np.concatenate([candidates % repetition, np.arange(repetition, dtype=float)])
+
+    # Evaluate the exact distance at every candidate, including all frames for robustness
+    first_angles = first_angle + first_increment * candidates
+    second_angles = second_angle + second_increment * candidates
+    differences = (
+        first_center
+        + first_radius * np.stack([np.cos(first_angles), np.sin(first_angles)], axis=-1)
+        - second_center
+        - second_radius * np.stack([np.cos(second_angles), np.sin(second_angles)], axis=-1)
+    )
+    distances = np.linalg.norm(differences, axis=-1)
+    best = int(np.argmin(distances))
+
+    return float(distances[best]), float(candidates[best])
+
+
+def maximum_speed(obj: dict[str, Any], objects: list[dict[str, Any]], number_of_frames: int) -> float:
+    """Bounds how far an object moves within one frame.
+
+    Args:
+        obj: The object configuration
+        objects: All objects of the scene, needed to follow the center of an orbit
+        number_of_frames: The number of frames of the video
+
+    Returns:
+        The maximum distance travelled per frame
+    """
+
+    cycles = obj.get("cycles", {})
+    if "linear" in cycles:
+        motion = describe_motion(obj, objects)
+        return float(np.linalg.norm(motion[2] - motion[1])) / (motion[3] / 2.0)
+
+    if "orbit" in cycles:
+        orbit = cycles["orbit"]
+        if "radius" not in orbit:
+            # Per-frame states of old scene files, bounded by the largest step between frames
+            locations = CycleTrajectory(obj, objects).location(np.arange(number_of_frames))
+            return float(np.max(np.linalg.norm(np.diff(locations, axis=0), axis=-1), initial=0.0))
+
+        return orbit["radius"] * abs(orbit["angle_increment"]) + maximum_speed(
+            objects[obj["center"]], objects, number_of_frames
+        )
+
+    return 0.0
+
+
+def sampled_separation(
+    first: dict[str, Any],
+    second: dict[str, Any],
+    objects: list[dict[str, Any]],
+    number_of_frames: int,
+    minimum_distance: float | None = None,
+) -> tuple[float, float]:
+    """Bounds the minimum distance of two objects from below by their distances at and in between frames.
+
+    Each sample covers the times within half a step of it, in which both objects approach each other by at
+    most half of the distance they travel in one step. Starting from every frame until both locations repeat
+    at once, the samples that may still cover a closer approach than the closest sample so far are refined
+    by halving the step, until this margin is below SAMPLING_TOLERANCE or a step is 1 / MAX_SUBSTEPS frames.
+    Motions given by per-frame states are only sampled at frames.
+
+    Args:
+        first: The first object configuration
+        second: The second object configuration
+        objects: All objects of the scene, needed to follow the center of an orbit
+        number_of_frames: The number of frames of the video
+        minimum_distance: Stops refining once it is known whether the objects keep this distance, as the
+            lower bound only grows with refining; refines fully if None
+
+    Returns:
+        The lower bound of the minimum distance and the frame the objects are closest at
+    """
+
+    first_trajectory, second_trajectory = CycleTrajectory(first, objects), CycleTrajectory(second, objects)
+    margin = 0.5 * (
+        maximum_speed(first, objects, number_of_frames) + maximum_speed(second, objects, number_of_frames)
+    )
+    repetition = math.lcm(
+        first_trajectory.location_period(number_of_frames), second_trajectory.location_period(number_of_frames)
+    )
+
+    frames = np.arange(repetition, dtype=float)
+    distances = np.linalg.norm(first_trajectory.location(frames) - second_trajectory.location(frames), axis=-1)
+    closest = int(np.argmin(distances))
+    best, best_frame = float(distances[closest]), float(frames[closest])
+
+    # Samples dropped before cover no approach closer than the closest sample
+    step = 1.0
+    lower_bound = min(best, float(np.min(distances)) - margin * step)
+    refinable = not has_states(first, objects) and not has_states(second, objects)
+    while refinable and margin * step > SAMPLING_TOLERANCE and step * MAX_SUBSTEPS > 1.0:
+        if minimum_distance is not None and (lower_bound >= minimum_distance or best < minimum_distance):
+            break
+
+        frames = frames[distances - margin * step < best]
+        step /= 2.0
+        frames = np.concatenate([frames - step / 2.0, frames + step / 2.0]) % repetition
+        distances = np.linalg.norm(
+            first_trajectory.location(frames) - second_trajectory.location(frames), axis=-1
+        )
+        closest = int(np.argmin(distances))
+        if distances[closest] < best:
+            best, best_frame = float(distances[closest]), float(frames[closest])
+        lower_bound = min(best, float(np.min(distances)) - margin * step)
+
+    return max(lower_bound, 0.0), best_frame
+
+
+def swept_bounds(obj: dict[str, Any], objects: list[dict[str, Any]], number_of_frames: int) -> np.ndarray:
+    """Bounds the space an object sweeps over the whole video, also in between frames, by a box.
+
+    Args:
+        obj: The object configuration
+        objects: All objects of the scene, needed to follow the center of an orbit
+        number_of_frames: The number of frames of the video
+
+    Returns:
+        The minimum and maximum x and y as (4,) array
+    """
+
+    motion = describe_motion(obj, objects)
+    if motion is not None and motion[0] == "static":
+        return np.concatenate([motion[1], motion[1]])
+    if motion is not None and motion[0] == "linear":
+        return np.concatenate([np.minimum(motion[1], motion[2]), np.maximum(motion[1], motion[2])])
+    if motion is not None and motion[0] == "orbit":
+        return np.concatenate([motion[1] - motion[2], motion[1] + motion[2]])
+
+    # In between two frames, an object stays within half of the distance it travels per frame of either
+    trajectory = CycleTrajectory(obj, objects)
+    locations = trajectory.location(np.arange(trajectory.location_period(number_of_frames)))
+    margin = 0.5 * maximum_speed(obj, objects, number_of_frames)
+
+    return np.concatenate([locations.min(axis=0) - margin, locations.max(axis=0) + margin])
+
+
+def has_states(obj: dict[str, Any], objects: list[dict[str, Any]]) -> bool:
+    """Checks if the motion of an object is given by per-frame states, which cannot be evaluated in between frames.
+
+    Args:
+        obj: The object configuration
+        objects: All objects of the scene, needed to follow the center of an orbit
+
+    Returns:
+        True if the object or any center it orbits has per-frame states, False otherwise
+    """
+
+    orbit = obj.get("cycles", {}).get("orbit")
+    if orbit is None:
+        return False
+
+    return "radius" not in orbit or has_states(objects[obj["center"]], objects)
+
+
+def minimum_separation(
+    first: dict[str, Any],
+    second: dict[str, Any],
+    objects: list[dict[str, Any]],
+    number_of_frames: int,
+    minimum_distance: float | None = None,
+) -> tuple[float, float]:
+    """Computes the minimum distance between two objects over the whole video, also in between frames.
+
+    Args:
+        first: The first object configuration
+        second: The second object configuration
+        objects: All objects of the scene, needed to find the center of an orbit
+        number_of_frames: The number of frames of the video, which all periods divide
+        minimum_distance: The distance the objects need to keep, to only sample motions without closed form
+            until it is known whether they do
+
+    Returns:
+        The minimum distance and the first (fractional) frame it is reached at, or a lower bound of the
+        distance and the closest frame for motions without closed form
+    """
+
+    first_motion, second_motion = describe_motion(first, objects), describe_motion(second, objects)
+    if first_motion is None or second_motion is None:
+        return sampled_separation(first, second, objects, number_of_frames, minimum_distance)
+
+    # Order each pair of motions as static, linear, orbit
+    kinds = ("static", "linear", "orbit")
+    if kinds.index(first_motion[0]) > kinds.index(second_motion[0]):
+        first_motion, second_motion = second_motion, first_motion
+
+    match first_motion[0], second_motion[0]:
+        case "static", "static":
+            return float(np.linalg.norm(first_motion[1] - second_motion[1])), 0.0
+        case "static", "linear":
+            return point_to_linear(first_motion[1], second_motion)
+        case "static", "orbit":
+            return point_to_orbit(first_motion[1], second_motion)
+        case "linear", "linear":
+            return linear_to_linear(first, second)
+        case "orbit", "orbit":
+            return orbit_to_orbit(first_motion, second_motion)
+
+    return sampled_separation(first, second, objects, number_of_frames, minimum_distance)
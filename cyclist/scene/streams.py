@@ -0,0 +1,48 @@
+"""This file contains the RandomStreams, deriving independent random number generators for each part of a scene."""
+
+# Third Party
+import numpy as np
+
+
+class RandomStreams:
+    """Derives independent random number generators of a scene from its seed and index.
+
+    Each generator is seeded from SeedSequence(seed, spawn_key=(scene_index, stream, *key)),
+    so it neither depends on other scenes nor on the order in which other parts of the scene
+    draw their random numbers. For example, the cycles of a single object can be regenerated
+    from its stream key without replaying the generation of the whole scene.
+
+    The streams are:
+        placement: Which objects are placed where, i.e., meshes, materials, sizes, orientations and locations
+        cycles: The number, assignment and parameters of the cycles, including intermittent sizes and colors
+        colors: The colors of objects
+        jitter: The jitter of camera and lights when rendering
+
+    Args:
+        seed: The randomization seed of the dataset
+        scene_index: The index of the scene
+    """
+
+    STREAMS = ("placement", "cycles", "colors", "jitter")
+
+    def __init__(self, seed: int, scene_index: int) -> "RandomStreams":
+        self.seed = seed
+        self.scene_index = scene_index
+
+    def get(self, stream: str, *key: int) -> np.random.Generator:
+        """Creates the random number generator of a stream.
+
+        Args:
+            stream: The name of the stream, one of RandomStreams.STREAMS
+            key: Further non-negative integers identifying a part of the scene, e.g., an object
+
+        Returns:
+            A freshly seeded random number generator, returning the same numbers for the same arguments
+        """
+
+        return np.random.default_rng(
+            np.random.SeedSequence(
+                self.seed,
+                spawn_key=(self.scene_index, self.STREAMS.index(stream), *key),
+            )
+        )
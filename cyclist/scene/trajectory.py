@@ -0,0 +1,239 @@
+"""Evaluates the cyclical state transitions of objects and lights at arbitrary frames.
+
+Cycles are stored in the scene config as parameter records, e.g., the period, initial angle
+and radius of an orbit, rather than as materialized per-frame states.
+Throughout, frames are 0-based indices, i.e., frame index 0 corresponds to Blender's frame 1.
+"""
+
+# Standard Library
+from typing import Any
+
+# Third Party
+import numpy as np
+
+
+def triangle(frames: np.ndarray, period: int) -> np.ndarray:
+    """Weight of the intermittent state of a keyframed cycle that goes there and back again.
+
+    Used for resize and recolor cycles, which are keyframed at the start, the middle (period // 2)
+    and the end of each cycle and linearly interpolated by Blender in between.
+
+    Args:
+        frames: The frame indices to evaluate
+        period: The cycle period in frames
+
+    Returns:
+        0 at the start of each cycle, rising linearly to 1 at its middle and falling back to 0 at its end
+    """
+
+    middle = period // 2
+    cycle_frames = np.asarray(frames) % period
+
+    return np.where(
+        cycle_frames <= middle,
+        cycle_frames / middle,
+        1.0 - (cycle_frames - middle) / (period - middle),
+    )
+
+
+def light_intensity(lights: dict[str, Any], frames: np.ndarray) -> np.ndarray:
+    """Evaluates the relative light intensity of the day-night cycle.
+
+    Args:
+        lights: The light cycle of the scene config
+        frames: The frame indices to evaluate
+
+    Returns:
+        The intensity in [0, 1] for each frame
+    """
+
+    cycle_frames = np.asarray(frames) % lights["period"]
+
+    return 0.5 * np.cos((cycle_frames / lights["period"]) * (2 * np.pi)) + 0.5
+
+
+def hyperperiod(scene_config: dict[str, Any]) -> int:
+    """Computes after how many frames the whole scene repeats itself.
+
+    Since each period is a product of prime factors of the number of frames, the least common
+    multiple of all object and light periods divides the number of frames as well.
+
+    Args:
+        scene_config: The configuration of the scene
+
+    Returns:
+        The least common multiple of all periods in the scene, or the number of frames if any period is unknown
+    """
+
+    number_of_frames = int(scene_config["fps"] * scene_config["duration"])
+
+    periods = [
+        cycle.get("period")
+        for obj in scene_config.get("objects", [])
+        for cycle in obj.get("cycles", {}).values()
+    ]
+    if scene_config.get("cyclic_lights"):
+        periods.append(scene_config["lights"].get("period"))
+
+    if any(period is None for period in periods):
+        return number_of_frames
+
+    return int(np.lcm.reduce([1] + periods))
+
+
+class CycleTrajectory:
+    """Evaluates an object's state at any frame or array of frames from its cycle parameters.
+
+    Scene configs written before cycles were stored as parameters only contain per-frame
+    states for orbits, which are then looked up instead.
+
+    Args:
+        obj: The object configuration
+        objects: All objects of the scene, needed to follow the center of an orbit
+    """
+
+    def __init__(
+        self, obj: dict[str, Any], objects: list[dict[str, Any]] | None = None
+    ) -> "CycleTrajectory":
+        self.obj = obj
+        self.objects = objects
+        self.cycles = obj.get("cycles", {})
+
+    def location_period(self, number_of_frames: int) -> int:
+        """Computes after how many frames the location of the object repeats itself.
+
+        Args:
+            number_of_frames: The number of frames of the video, which all periods divide
+
+        Returns:
+            1 for objects that stay in place, the period of their motion otherwise, also repeating
+            the motion of any center they orbit, or the number of frames for per-frame states
+        """
+
+        if "linear" in self.cycles:
+            return self.cycles["linear"]["period"]
+
+        if "orbit" in self.cycles:
+            orbit = self.cycles["orbit"]
+            if "radius" not in orbit:
+                return number_of_frames
+
+            center = CycleTrajectory(self.objects[self.obj["center"]], self.objects)
+            return int(np.lcm(orbit["period"], center.location_period(number_of_frames)))
+
+        return 1
+
+    def location(self, frames: np.ndarray) -> np.ndarray:
+        """Evaluates the (x, y) location of the object.
+
+        Args:
+            frames: The frame indices to evaluate
+
+        Returns:
+            Array of shape (frames, 2)
+        """
+
+        frames = np.asarray(frames)
+        start = np.array([self.obj["location"]["x"], self.obj["location"]["y"]], dtype=float)
+
+        if "linear" in self.cycles:
+            period = self.cycles["linear"]["period"]
+            intermittent = np.array(
+                [
+                    self.obj["intermittent_location"]["x"],
+                    self.obj["intermittent_location"]["y"],
+                ]
+            )
+
+            # Moving towards intermittent location in the first half of each cycle, back again in the second
+            cycle_frames = frames % period
+            progress = np.where(
+                cycle_frames <= period / 2.0,
+                cycle_frames / (period / 2.0),
+                1.0 - (cycle_frames - period / 2.0) / (period / 2.0),
+            )
+
+            return start + progress[:, None] * (intermittent - start)
+
+        if "orbit" in self.cycles:
+            orbit = self.cycles["orbit"]
+            if "radius" not in orbit:
+                return np.array(
+                    [
+                        [orbit["states"][frame]["location"]["x"], orbit["states"][frame]["location"]["y"]]
+                        for frame in frames
+                    ]
+                )
+
+            # Follow the center if it is moving itself
+            center = CycleTrajectory(self.objects[self.obj["center"]], self.objects)
+            angles = orbit["initial_angle"] + orbit["angle_increment"] * (frames % orbit["period"])
+
+            return center.location(frames) + orbit["radius"] * np.stack(
+                [np.cos(angles), np.sin(angles)], axis=-1
+            )
+
+        return np.tile(start, (len(frames), 1))
+
+    def rotation(self, frames: np.ndarray) -> np.ndarray:
+        """Evaluates the rotation of the object relative to its initial orientation.
+
+        Args:
+            frames: The frame indices to evaluate
+
+        Returns:
+            Array of shape (frames, 3) with Euler angles
+        """
+
+        frames = np.asarray(frames)
+        if "rotate" not in self.cycles:
+            return np.zeros((len(frames), 3))
+
+        rotate = self.cycles["rotate"]
+        angle_per_frame = rotate.get(
+            "angle_per_frame", [2.0 * np.pi / rotate["period"], 0.0, 0.0]
+        )
+
+        return (frames % rotate["period"])[:, None] * np.array(angle_per_frame)
+
+    def size(self, frames: np.ndarray, sizes: dict[str, float]) -> np.ndarray:
+        """Evaluates the size of the object.
+
+        Args:
+            frames: The frame indices to evaluate
+            sizes: The sizes of the scene config, mapping names to values
+
+        Returns:
+            Array of shape (frames,)
+        """
+
+        frames = np.asarray(frames)
+        size = sizes[self.obj["size"]]
+        if "resize" not in self.cycles:
+            return np.full(len(frames), size)
+
+        intermittent_size = sizes[self.obj["intermittent_size"]]
+        weight = triangle(frames, self.cycles["resize"]["period"])
+
+        return size + weight * (intermittent_size - size)
+
+    def color(self, frames: np.ndarray, colors: dict[str, list[float]]) -> np.ndarray:
+        """Evaluates the RGBA color of the object.
+
+        Args:
+            frames: The frame indices to evaluate
+            colors: The colors of the scene config, mapping names to RGBA values
+
+        Returns:
+            Array of shape (frames, 4)
+        """
+
+        frames = np.asarray(frames)
+        color = np.array(colors[self.obj["color"]])
+        if "recolor" not in self.cycles:
+            return np.tile(color, (len(frames), 1))
+
+        intermittent_color = np.array(colors[self.obj["intermittent_color"]])
+        weight = triangle(frames, self.cycles["recolor"]["period"])
+
+        return color + weight[:, None] * (intermittent_color - color)
@@ -2,13 +2,16 @@
 
 # Standard Library
 from typing import Any
-from copy import deepcopy
 
 # Third Party
 import numpy as np
 
 # CycliST
-from cyclist.utility import get_frame
+from cyclist.scene.separation import minimum_separation, swept_bounds
+from cyclist.utility import get_location_periods, get_locations
+
+# From this many objects on, only pairs found by the broad phase are compared exactly
+BROAD_PHASE_MINIMUM_OBJECTS = 16
 
 
 class Validator:
@@ -22,18 +25,241 @@ class Validator:
             documented in cyclist/cyclist.py
     """
 
+    def __init__(self) -> "Validator":
+        # Bounding boxes swept by the accepted objects as (objects, 4) array of minimum and maximum x and y
+        self.bounds = None
+
+    def reset(self) -> None:
+        """Forgets the trajectories of all accepted objects."""
+
+        self.bounds = None
+
+    def accept(self, scene_config: dict[str, Any], object_config: dict[str, Any]) -> None:
+        """Adds the space swept by an object that has been inserted into the scene to the cache.
+
+        Args:
+            scene_config: The configuration of the scene, already containing the object
+            object_config: The accepted object
+        """
+
+        self.synchronize(scene_config, len(scene_config["objects"]) - 1)
+        number_of_frames = int(scene_config["fps"] * scene_config["duration"])
+        bounds = swept_bounds(object_config, scene_config["objects"], number_of_frames)
+
+        self.bounds = np.concatenate([self.bounds, bounds[None, :]])
+
+    def synchronize(self, scene_config: dict[str, Any], number_of_objects: int | None = None) -> None:
+        """Rebuilds the cache if it does not hold the space swept by the scene's objects.
+
+        Args:
+            scene_config: The configuration of the scene
+            number_of_objects: How many of the scene's objects the cache should hold; all if None
+        """
+
+        objects = scene_config.get("objects", [])
+        number_of_objects = len(objects) if number_of_objects is None else number_of_objects
+
+        if self.bounds is None or len(self.bounds) != number_of_objects:
+            number_of_frames = int(scene_config["fps"] * scene_config["duration"])
+            self.bounds = np.array(
+                [swept_bounds(obj, objects, number_of_frames) for obj in objects[:number_of_objects]]
+            ).reshape(-1, 4)
+
+    def find_candidate_collision(
+        self, scene_config: dict[str, Any], object_config: dict[str, Any]
+    ) -> tuple[int, int] | None:
+        """Checks a candidate object only against the already accepted objects of the scene, also in between frames.
+
+        Args:
+            scene_config: The configuration of the scene, not yet containing the candidate
+            object_config: The candidate object
+
+        Returns:
+            The frame the candidate comes closest to the existing object it collides with and its index, or None
+        """
+
+        self.synchronize(scene_config)
+        objects = scene_config.get("objects", [])
+        number_of_frames = int(scene_config["fps"] * scene_config["duration"])
+        bounds = swept_bounds(object_config, objects, number_of_frames)
+
+        # Broad phase: only objects whose swept bounding boxes come closer than minimum_distance can collide
+        gaps = np.maximum(0.0, np.maximum(bounds[:2] - self.bounds[:, 2:], self.bounds[:, :2] - bounds[2:]))
+        nearby = np.nonzero(np.sqrt(np.sum(gaps**2, axis=-1)) < scene_config["minimum_distance"])[0]
+
+        # The exact minimum distance over the whole video, bounded by sampling only for motions without closed form
+        for index in nearby:
+            distance, frame = minimum_separation(
+                object_config, objects[index], objects, number_of_frames, scene_config["minimum_distance"]
+            )
+            if distance < scene_config["minimum_distance"]:
+                return int(frame) % number_of_frames, int(index)
+
+        return None
+
     @staticmethod
     def pairwise_distances(objects: list[dict[str, Any]]) -> list[float]:
-        distances = []
-        for i in range(len(objects)):
-            for j in range(len(objects)):
-                if i != j:
-                    distances.append(np.sqrt(
-                        (objects[i]["location"]["x"] - objects[j]["location"]["x"]) ** 2
-                        + (objects[i]["location"]["y"] - objects[j]["location"]["y"]) ** 2
-                    ))
+        # The stored location of each object, which for orbits need not be where it is in the first frame
+        locations = np.array([[obj["location"]["x"], obj["location"]["y"]] for obj in objects]).reshape(-1, 2)
+        distances = np.linalg.norm(locations[:, None, :] - locations[None, :, :], axis=-1)
 
-        return distances
+        return list(distances[~np.eye(len(objects), dtype=bool)])
+
+    @staticmethod
+    def close_pairs_exhaustive(
+        locations: np.ndarray, minimum_distance: float
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Finds all object pairs that are too close by comparing every pair in every frame.
+
+        Args:
+            locations: The trajectories of all objects as (frames, objects, 2) array
+            minimum_distance: The distance objects need to keep
+
+        Returns:
+            The frames and object pairs (i, j) with i < j that are too close, sorted by frame, i and j
+        """
+
+        differences = locations[:, :, None, :] - locations[:, None, :, :]
+        distances = np.sqrt(np.sum(differences**2, axis=-1))
+
+        # Only consider each unordered pair once
+        number_of_objects = locations.shape[1]
+        upper = np.triu(np.ones((number_of_objects, number_of_objects), dtype=bool), k=1)
+
+        return np.nonzero((distances < minimum_distance) & upper)
+
+    @staticmethod
+    def candidate_pairs(
+        locations: np.ndarray, minimum_distance: float
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Finds the object pairs that may be too close, i.e., lie in adjacent cells of a uniform grid.
+
+        Per frame, objects are binned into rows of height minimum_distance and swept along x, so only pairs
+        in the same or neighbouring rows that are closer than minimum_distance along x are returned.
+
+        Args:
+            locations: The trajectories of all objects as (frames, objects, 2) array
+            minimum_distance: The distance objects need to keep
+
+        Returns:
+            The frames and object pairs (i, j) with i < j, a superset of the pairs that are too close
+        """
+
+        number_of_frames, number_of_objects, _ = locations.shape
+
+        # Slightly larger cells and windows keep rounding errors from dropping pairs right at the distance
+        cell_size = minimum_distance * (1.0 + 1e-6)
+        rows = np.floor(locations[..., 1] / cell_size).astype(np.int64)
+        rows -= rows.min()
+        groups = np.arange(number_of_frames)[:, None] * (rows.max() + 3) + rows + 1
+
+        # Sort by frame, row and x with a single key, x being scaled into [0, 0.5) of its row
+        minimum_x = locations[..., 0].min()
+        scale = 0.5 / (locations[..., 0].max() - minimum_x + 2.0 * cell_size)
+        keys = (groups + scale * (locations[..., 0] - minimum_x + cell_size)).ravel()
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+
+        # Sweep the window along x in the own and both neighbouring rows
+        first, second = [], []
+        for row_offset in (-1, 0, 1):
+            starts = np.searchsorted(sorted_keys, keys + row_offset - scale * cell_size, side="left")
+            ends = np.searchsorted(sorted_keys, keys + row_offset + scale * cell_size, side="right")
+            counts = ends - starts
+
+            # Enumerate the window of each object
+            owners = np.repeat(np.arange(len(keys)), counts)
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            first.append(owners)
+            second.append(order[np.repeat(starts, counts) + offsets])
+
+        first, second = np.concatenate(first), np.concatenate(second)
+
+        # Pairs are found from both of their objects, only keep them once
+        frames, first, second = first // number_of_objects, first % number_of_objects, second % number_of_objects
+        keep = first < second
+
+        return frames[keep], first[keep], second[keep]
+
+    @staticmethod
+    def close_pairs(
+        locations: np.ndarray, minimum_distance: float
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Finds all object pairs that are too close, identical to close_pairs_exhaustive.
+
+        Only the candidate pairs of the broad phase are compared exactly, so that the cost grows
+        with the number of nearby pairs instead of all pairs.
+
+        Args:
+            locations: The trajectories of all objects as (frames, objects, 2) array
+            minimum_distance: The distance objects need to keep
+
+        Returns:
+            The frames and object pairs (i, j) with i < j that are too close, sorted by frame, i and j
+        """
+
+        frames, first, second = Validator.candidate_pairs(locations, minimum_distance)
+
+        # Computed just as for all pairs, so that the results are identical
+        differences = locations[frames, first] - locations[frames, second]
+        distances = np.sqrt(np.sum(differences**2, axis=-1))
+        close = distances < minimum_distance
+        frames, first, second = frames[close], first[close], second[close]
+
+        order = np.lexsort((second, first, frames))
+
+        return frames[order], first[order], second[order]
+
+    @staticmethod
+    def find_close_pairs(
+        locations: np.ndarray, minimum_distance: float
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Finds all object pairs that are too close, using the broad phase only for many objects.
+
+        Args:
+            locations: The trajectories of all objects as (frames, objects, 2) array
+            minimum_distance: The distance objects need to keep
+
+        Returns:
+            The frames and object pairs (i, j) with i < j that are too close, sorted by frame, i and j
+        """
+
+        if locations.shape[1] < BROAD_PHASE_MINIMUM_OBJECTS:
+            return Validator.close_pairs_exhaustive(locations, minimum_distance)
+
+        return Validator.close_pairs(locations, minimum_distance)
+
+    @staticmethod
+    def find_collision(
+        scene_config: dict[str, Any], objects: list[dict[str, Any]] | None = None
+    ) -> tuple[int, int, int] | None:
+        """Checks all object pairs over all frames of the video at once.
+
+        Args:
+            scene_config: The configuration of the scene
+            objects: The objects to check; uses the scene's objects if None was provided
+
+        Returns:
+            The first frame and object pair (i, j) with i < j that are too close, or None if there is none
+        """
+
+        if objects is None:
+            objects = scene_config["objects"]
+
+        # Stack all trajectories into one (frames, objects, 2) array and compare nearby pairs,
+        # which all repeat within the least common multiple of the objects' periods
+        number_of_frames = int(scene_config["fps"] * scene_config["duration"])
+        locations = get_locations(
+            objects, int(np.lcm.reduce(get_location_periods(objects, number_of_frames), initial=1))
+        )
+        frames, first, second = Validator.find_close_pairs(
+            locations, scene_config["minimum_distance"]
+        )
+
+        if len(frames) == 0:
+            return None
+
+        return int(frames[0]), int(first[0]), int(second[0])
 
     @staticmethod
     def is_collision_free(
@@ -52,12 +278,4 @@ class Validator:
     def is_always_collision_free(
         scene_config: dict[str, Any], objects: dict[str, Any] | None = None
     ) -> bool:
-        if objects is None:
-            objects = scene_config["objects"]
-
-        for frame in range(int(scene_config["fps"] * scene_config["duration"])):
-            frame_objects = get_frame(frame, objects)
-            if not Validator.is_collision_free(scene_config, frame_objects):
-                return False
-
-        return True
+        return Validator.find_collision(scene_config, objects) is None
@@ -0,0 +1,100 @@
+"""This file contains the RenderWorker, a long-lived Blender process rendering many scenes."""
+
+# Standard Library
+import subprocess
+
+# Markers printed by the renderer after each scene, followed by the scene configuration's path
+RENDERED = "CYCLIST_RENDERED"
+FAILED = "CYCLIST_FAILED"
+
+# Marker printed by the renderer after calibrating the samples shared by all frame chunks, followed by their number
+CALIBRATED = "CYCLIST_CALIBRATED"
+
+
+class RenderWorker:
+    """Keeps a Blender process running cyclist/scene/renderer.py alive across scenes.
+
+    Starting Blender, opening the base scene and appending all materials only happens once,
+    instead of for every scene. The worker is (re)started on demand, e.g., if Blender crashed.
+    """
+
+    def __init__(self) -> "RenderWorker":
+        self.process = None
+
+    def start(self) -> None:
+        """Starts the Blender process waiting for scenes to render."""
+
+        self.process = subprocess.Popen(
+            [
+                "blender",
+                "--background",
+                "--python",
+                "cyclist/scene/renderer.py",
+                "--",
+                "--serve",
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+        )
+
+    def render(self, scene_config_path: str) -> bool:
+        """Renders a scene and waits for it to finish.
+
+        Args:
+            scene_config_path: The path to the scene configuration, which is updated by the renderer
+
+        Returns:
+            True if the scene has been rendered, False otherwise in which case Blender's output is printed
+        """
+
+        if self.process is None or self.process.poll() is not None:
+            self.start()
+
+        self.process.stdin.write(scene_config_path + "\n")
+        self.process.stdin.flush()
+
+        # Blender's output is only of interest if something went wrong
+        output = []
+        for line in self.process.stdout:
+            if line.rstrip("\n") == f"{RENDERED} {scene_config_path}":
+                return True
+            if line.rstrip("\n") == f"{FAILED} {scene_config_path}":
+                print("".join(output))
+                return False
+
+            output.append(line)
+
+        # Blender exited before finishing the scene
+        print("".join(output))
+        self.process = None
+
+        return False
+
+    def close(self) -> None:
+        """Lets the Blender process finish and waits for it to exit."""
+
+        if self.process is not None:
+            self.process.stdin.close()
+            self.process.wait()
+            self.process = None
+
+
+# The worker of this process, started on first use
+render_worker = None
+
+
+def get_render_worker() -> RenderWorker:
+    """Gets the render worker of this process, so each of multiple processes owns its own Blender.
+
+    Returns:
+        The RenderWorker of the current process
+    """
+
+    global render_worker
+    if render_worker is None:
+        render_worker = RenderWorker()
+
+    return render_worker
@@ -9,37 +9,215 @@ import json
 # Third Party
 import numpy as np
 
+# CycliST
+from cyclist.scene.trajectory import CycleTrajectory, light_intensity
+
+
+# The per-frame state key and its JSON layout for cycles that change every frame
+STATE_KEYS = {"linear": "location", "orbit": "location", "rotate": "rotation"}
+
+
+def get_trajectory(
+    obj: dict[str, Any],
+    number_of_frames: int,
+    objects: list[dict[str, Any]] | None = None,
+) -> np.ndarray:
+    """Returns the (x, y) location of an object for each frame as array of shape (frames, 2).
+
+    Args:
+        obj: The object configuration
+        number_of_frames: The number of frames of the video
+        objects: All objects of the scene, needed if the object orbits another one
+    """
+
+    return CycleTrajectory(obj, objects).location(np.arange(number_of_frames))
+
+
+def get_locations(objects: list[dict[str, Any]], number_of_frames: int) -> np.ndarray:
+    """Returns the (x, y) locations of all objects through time as array of shape (frames, objects, 2).
+
+    Args:
+        objects: The object configurations
+        number_of_frames: The number of frames of the video
+    """
+
+    if len(objects) == 0:
+        return np.zeros((number_of_frames, 0, 2))
+
+    return np.stack(
+        [get_trajectory(obj, number_of_frames, objects) for obj in objects], axis=1
+    )
+
+
+def get_location_periods(objects: list[dict[str, Any]], number_of_frames: int) -> np.ndarray:
+    """Returns after how many frames the location of each object repeats itself as array of shape (objects,).
+
+    Args:
+        objects: The object configurations
+        number_of_frames: The number of frames of the video
+    """
+
+    return np.array(
+        [CycleTrajectory(obj, objects).location_period(number_of_frames) for obj in objects], dtype=int
+    )
+
+
+def tile_frames(values: np.ndarray, number_of_frames: int, axis: int = 0) -> np.ndarray:
+    """Repeats the values of the first frames of something periodic until the end of the video.
+
+    Args:
+        values: The values over one period, whose length divides the number of frames
+        number_of_frames: The number of frames of the video
+        axis: The frame axis of the values
+    """
+
+    repetitions = [1] * values.ndim
+    repetitions[axis] = number_of_frames // values.shape[axis]
+
+    return np.tile(values, repetitions)
+
 
 def get_frame(frame: int, objects: list[dict[str, Any]]) -> list[dict[str, Any]]:
     """Returns a dictionary of all the objects at a certain frame."""
 
     frame_objects = []
     for obj in objects:
-        if "cycles" in obj.keys() and "linear" in obj["cycles"].keys():
-            frame_objects.append(
-                {
-                    "location": obj["cycles"]["linear"]["states"][frame]["location"],
-                    "size": obj["size"],
-                }
-            )
-        elif "cycles" in obj.keys() and "orbit" in obj["cycles"].keys():
-            frame_objects.append(
-                {
-                    "location": obj["cycles"]["orbit"]["states"][frame]["location"],
-                    "size": obj["size"],
-                }
-            )
-        else:
-            frame_objects.append(
-                {
-                    "location": obj["location"],
-                    "size": obj["size"],
-                }
-            )
+        x, y = CycleTrajectory(obj, objects).location([frame])[0]
+        frame_objects.append(
+            {
+                "location": {"x": float(x), "y": float(y)},
+                "size": obj["size"],
+            }
+        )
 
     return frame_objects
 
 
+def serialize_states(name: str, states: np.ndarray) -> list[dict[str, Any]]:
+    """Expands an array of per-frame cycle states into the JSON layout of the scene config.
+
+    Args:
+        name: The name of the cycle, e.g., 'orbit', or 'lights' for the light cycle
+        states: The per-frame states with the first entry belonging to frame 1
+    """
+
+    if name == "lights":
+        return [
+            {"intensity": float(intensity), "frame": frame + 1}
+            for frame, intensity in enumerate(states)
+        ]
+
+    if STATE_KEYS[name] == "location":
+        return [
+            {"location": {"x": float(x), "y": float(y)}, "frame": frame + 1}
+            for frame, (x, y) in enumerate(states)
+        ]
+
+    return [
+        {STATE_KEYS[name]: [float(value) for value in state], "frame": frame + 1}
+        for frame, state in enumerate(states)
+    ]
+
+
+def serialize_scene_config(scene_config: dict[str, Any]) -> dict[str, Any]:
+    """Returns the scene config as it is written to disk.
+
+    Cycles are stored as parameter records. Only if 'write_states' is set, the per-frame
+    states of location, rotation and light cycles are materialized as in CycliST 1.0 files.
+
+    Args:
+        scene_config: The configuration of the scene
+    """
+
+    if not scene_config.get("write_states", False):
+        return scene_config
+
+    frames = np.arange(int(scene_config["fps"] * scene_config["duration"]))
+    serialized = dict(scene_config)
+
+    if "objects" in scene_config.keys():
+        serialized["objects"] = []
+        for obj in scene_config["objects"]:
+            trajectory = CycleTrajectory(obj, scene_config["objects"])
+            obj = dict(obj)
+            if "cycles" in obj.keys():
+                obj["cycles"] = {
+                    name: dict(cycle) for name, cycle in obj["cycles"].items()
+                }
+                for name, cycle in obj["cycles"].items():
+                    if name in ("linear", "orbit"):
+                        cycle["states"] = serialize_states(name, trajectory.location(frames))
+                    elif name == "rotate":
+                        cycle["states"] = serialize_states(name, trajectory.rotation(frames))
+            serialized["objects"].append(obj)
+
+    if "lights" in scene_config.keys():
+        serialized["lights"] = dict(scene_config["lights"])
+        serialized["lights"]["states"] = serialize_states(
+            "lights", light_intensity(scene_config["lights"], frames)
+        )
+
+    return serialized
+
+
+def encode_intervals(relation: np.ndarray) -> list[list[Any]]:
+    """Run-length encodes a per-frame relation into [start_frame, end_frame) intervals.
+
+    Args:
+        relation: Boolean array of shape (frames, objects, objects)
+
+    Returns:
+        A list of [i, j, [[start_frame, end_frame], ...]] for each ordered pair that is related at least once
+    """
+
+    # Pad with False on both ends so that each interval has exactly one start and one end
+    padded = np.zeros((relation.shape[0] + 2,) + relation.shape[1:], dtype=np.int8)
+    padded[1:-1] = relation
+
+    # Changes sorted by pair first, frame second, so starts and ends line up
+    changes = np.diff(padded, axis=0).transpose(1, 2, 0)
+    starts = np.argwhere(changes == 1)
+    ends = np.argwhere(changes == -1)
+
+    encoded = []
+    for (i, j, start), end in zip(starts.tolist(), ends[:, 2].tolist()):
+        if len(encoded) == 0 or encoded[-1][:2] != [i, j]:
+            encoded.append([i, j, []])
+        encoded[-1][2].append([start, end])
+
+    return encoded
+
+
+def expand_relationships(scene_config: dict[str, Any]) -> dict[str, dict[str, list[list[int]]]]:
+    """Returns the scene's relationships in the per-frame layout, expanding interval encoded ones.
+
+    Args:
+        scene_config: The configuration of the scene with either encoding of its relationships
+
+    Returns:
+        For each relation and frame the list of related pairs, as read from a per-frame encoded scene file
+    """
+
+    number_of_frames = int(scene_config["fps"] * scene_config["duration"])
+
+    expanded = {}
+    for name, relationship in scene_config["relationships"].items():
+        # Relations in the per-frame layout are stored as dictionaries
+        if isinstance(relationship, dict):
+            expanded[name] = relationship
+            continue
+
+        frames = [[] for _ in range(number_of_frames)]
+        for i, j, intervals in relationship:
+            for start, end in intervals:
+                for frame in range(start, end):
+                    frames[frame].append([i, j])
+
+        expanded[name] = {str(frame): pairs for frame, pairs in enumerate(frames)}
+
+    return expanded
+
+
 def parse_scene_config(args: list[str] | None = None) -> dict[str, Any]:
     """Gets a scene config from the provided arguments or the command line.
 
@@ -85,6 +263,12 @@ def parse_scene_config(args: list[str] | None = None) -> dict[str, Any]:
         action='store_true',
         help="Whether the scene's blendfile should be written to disk.",
     )
+    parser.add_argument(
+        "--write_states",
+        action='store_true',
+        help="Whether to also write the per-frame states of location, rotation and light cycles into the scene config. "
+        "By default, only the cycle parameters are stored and states are evaluated on demand.",
+    )
     parser.add_argument(
         "--blendfile_path",
         default="output/blendfiles",
@@ -97,6 +281,19 @@ def parse_scene_config(args: list[str] | None = None) -> dict[str, Any]:
         type=int,
         help="How many tries to insert an object.",
     )
+    parser.add_argument(
+        "--max_number_of_backtracks",
+        default=0,
+        type=int,
+        help="How many times per scene an already placed object that blocks a new one is re-sampled, "
+        "instead of restarting the whole scene.",
+    )
+    parser.add_argument(
+        "--free_space_sampling",
+        action='store_true',
+        help="Whether to draw object locations only from space that is not swept by already placed objects, "
+        "instead of uniformly from the whole scene.",
+    )
     parser.add_argument(
         "--force_generation",
         action='store_true',
@@ -132,8 +329,8 @@ def parse_scene_config(args: list[str] | None = None) -> dict[str, Any]:
     parser.add_argument(
         "--seed",
         type=int,
-        help="The randomization seed which will be combined with the scene index."
-        "So if the seed is 1 and scene index 2, the random state will be set to 3."
+        help="The randomization seed which will be combined with the scene index. "
+        "Each scene draws from independent random streams derived from SeedSequence(seed, scene_index). "
         "If None is given, a random seed is chosen.",
     )
     parser.add_argument(
@@ -148,6 +345,135 @@ def parse_scene_config(args: list[str] | None = None) -> dict[str, Any]:
         type=int,
         help="The number of videos to render.",
     )
+    parser.add_argument(
+        "--frame_format",
+        default="FFMPEG",
+        choices=["FFMPEG", "PNG", "OPEN_EXR"],
+        type=str,
+        help="Whether Blender encodes the video directly (FFMPEG) or renders single frames, "
+        "which are encoded to videos in the background while the next scene is rendered.",
+    )
+    parser.add_argument(
+        "--frame_directory",
+        default="output/frames",
+        type=str,
+        help="Where to write the rendered frames to if not encoding the video directly.",
+    )
+    parser.add_argument(
+        "--encode_resolutions",
+        default=[],
+        nargs="*",
+        type=str,
+        help="Further resolutions, e.g., 224x224, to encode downscaled videos in from the rendered frames.",
+    )
+    parser.add_argument(
+        "--encode_preset",
+        default="slow",
+        type=str,
+        help="The x264 preset used for encoding rendered frames.",
+    )
+    parser.add_argument(
+        "--encode_crf",
+        default=18,
+        type=int,
+        help="The x264 constant rate factor used for encoding rendered frames, lower is better quality.",
+    )
+    parser.add_argument(
+        "--encode_workers",
+        default=2,
+        type=int,
+        help="How many videos are encoded from rendered frames in parallel.",
+    )
+    parser.add_argument(
+        "--tensor_fps",
+        default=[],
+        nargs="*",
+        type=int,
+        help="Sampling rates in frames per second to write uint8 frame arrays (.npy) for, "
+        "which the evaluation datasets load instead of decoding the video. Requires a --frame_format other than FFMPEG.",
+    )
+    parser.add_argument(
+        "--tensor_resolution",
+        default=None,
+        type=str,
+        help="The resolution of the frame arrays, e.g., 448x448, defaults to the rendered resolution.",
+    )
+    parser.add_argument(
+        "--tensor_directory",
+        default="output/tensors",
+        type=str,
+        help="Where to write the frame arrays to.",
+    )
+    parser.add_argument(
+        "--frame_processes",
+        default=1,
+        type=int,
+        help="The number of Blender processes each rendering a contiguous part of a scene's frames in parallel. "
+        "Requires a --frame_format other than FFMPEG.",
+    )
+    parser.add_argument(
+        "--render_threads",
+        default=0,
+        type=int,
+        help="The number of CPU threads of each Blender process, 0 to use all available cores.",
+    )
+    parser.add_argument(
+        "--no_persistent_data",
+        action='store_true',
+        help="Whether to rebuild all render data for every frame. By default, Cycles keeps the data of "
+        "static objects and the base scene across frames and only updates animated objects.",
+    )
+    parser.add_argument(
+        "--render_all_frames",
+        action='store_true',
+        help="Whether to render every frame of the video. By default, only the frames until the whole scene "
+        "repeats itself (the least common multiple of all cycle periods) are rendered and then looped.",
+    )
+    parser.add_argument(
+        "--persistent_blender",
+        action='store_true',
+        help="Whether to keep Blender running across scenes, loading the base scene and materials only once "
+        "instead of starting a new Blender process for every scene.",
+    )
+    parser.add_argument(
+        "--manifest_path",
+        default=None,
+        type=str,
+        help="An SQLite manifest of the scenes shared by all workers, also on other machines. Scenes are claimed there, "
+        "and restarts skip scenes completed with unchanged outputs and retry failed ones.",
+    )
+    parser.add_argument(
+        "--max_attempts",
+        default=3,
+        type=int,
+        help="How many times a scene is tried at most when using a manifest.",
+    )
+    parser.add_argument(
+        "--lease_timeout",
+        default=600.0,
+        type=float,
+        help="The time in seconds after which a scene claimed in the manifest is released on any machine "
+        "unless its worker has renewed the claim, which it does while working on the scene.",
+    )
+    parser.add_argument(
+        "--plan_only",
+        action='store_true',
+        help="Whether to only generate and write the scene configurations without rendering them in Blender. "
+        "The plans can be rendered later with 'python -m cyclist.render'.",
+    )
+    parser.add_argument(
+        "--directions_path",
+        default=None,
+        type=str,
+        help="Path to the camera's directions, either as JSON file or a rendered scene configuration, "
+        "to label spatial relations of plans without rendering them.",
+    )
+    parser.add_argument(
+        "--workers",
+        default=1,
+        type=int,
+        help="The number of processes generating and rendering scenes in parallel, each running its own Blender.",
+    )
     parser.add_argument(
         "--split",
         default="train",
@@ -178,6 +504,14 @@ def parse_scene_config(args: list[str] | None = None) -> dict[str, Any]:
         type=float,
         help="The threshold to decide if a spatial relationship holds based on the dot product between object displacement and cardinal relationship direction.",
     )
+    parser.add_argument(
+        "--relationship_encoding",
+        default="frames",
+        choices=["frames", "intervals"],
+        type=str,
+        help="How spatial relationships are stored in the scene config. "
+        "'frames' lists the related pairs for each frame, 'intervals' lists the [start, end) frame intervals for each related pair.",
+    )
     parser.add_argument(
         "--minimum_distance",
         default=1.5,
@@ -210,6 +544,27 @@ def parse_scene_config(args: list[str] | None = None) -> dict[str, Any]:
         type=int,
         help="How many samples blender takes for rendering.",
     )
+    parser.add_argument(
+        "--quality",
+        default="final",
+        choices=["preview", "draft", "final"],
+        type=str,
+        help="The quality tier. The preview renders with EEVEE and the draft with fewer bounces and adaptive sampling, "
+        "both at half resolution. The final renders with the configured samples and bounces.",
+    )
+    parser.add_argument(
+        "--noise_threshold",
+        default=None,
+        type=float,
+        help="The noise threshold of Cycles' adaptive sampling, overriding the one of the quality tier.",
+    )
+    parser.add_argument(
+        "--time_budget",
+        default=None,
+        type=float,
+        help="The wall-clock time in seconds for rendering a scene, for which the number of samples "
+        "is lowered as estimated by calibration renders of the first frame.",
+    )
     parser.add_argument(
         "--min_number_of_bounces",
         default=8,
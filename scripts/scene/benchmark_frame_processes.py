@@ -0,0 +1,86 @@
+"""Measures the speedup of rendering a scene's frames with multiple Blender processes on CPU.
+
+The same scene is rendered once for each combination of processes and threads per process,
+and compared to rendering it in a single process using all cores.
+
+    python scripts/scene/benchmark_frame_processes.py --processes 1 2 4 8 --threads 0 1 2 4
+"""
+
+from copy import deepcopy
+from itertools import product
+import argparse
+import json
+import os
+import time
+
+from cyclist.cyclist import CycliST
+from cyclist.scene.encoder import wait_for_encodings
+from cyclist.utility import parse_scene_config
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--processes", nargs="+", type=int, default=[1, 2, 4])
+parser.add_argument("--threads", nargs="+", type=int, default=[0],
+                    help="Threads per Blender process, 0 to use all available cores.")
+parser.add_argument("--output_directory", type=str, default="output/benchmark")
+args = parser.parse_args()
+
+os.makedirs(os.path.join(args.output_directory, "scenes"), exist_ok=True)
+os.makedirs(os.path.join(args.output_directory, "videos"), exist_ok=True)
+
+scene_config = parse_scene_config(
+    [
+        "--device",
+        "CPU",
+        "--seed",
+        "0",
+        "--number_of_clutter_objects",
+        "3",
+        "--number_of_orbit_cycles",
+        "1",
+        "--number_of_recolor_cycles",
+        "1",
+        "--render_all_frames",
+        "--frame_format",
+        "PNG",
+        "--scene_config_directory",
+        os.path.join(args.output_directory, "scenes"),
+        "--video_directory",
+        os.path.join(args.output_directory, "videos"),
+        "--frame_directory",
+        os.path.join(args.output_directory, "frames"),
+    ]
+)
+scene_config["scene_index"] = 0
+
+# Plan the scene once, every measurement renders the same plan
+cyclist = CycliST(scene_config=scene_config)
+assert cyclist.plan(), "The benchmark scene could not be generated."
+with open(cyclist.scene_config_file_path, "r") as scene_config_file:
+    plan = json.load(scene_config_file)
+
+render_times = {}
+for processes, threads in product(args.processes, args.threads):
+    benchmark_config = deepcopy(plan)
+    benchmark_config["frame_processes"] = processes
+    benchmark_config["render_threads"] = threads
+    benchmark_config["scene_config_file"] = f"benchmark_{processes}x{threads}_config.json"
+    benchmark_config["video_file"] = f"benchmark_{processes}x{threads}.mp4"
+
+    cyclist = CycliST(scene_config=benchmark_config)
+    with open(cyclist.scene_config_file_path, "w") as scene_config_file:
+        json.dump(benchmark_config, scene_config_file, indent=2)
+
+    # Wall time including Blender's startup, which rendering with more processes pays more often
+    start = time.time()
+    cyclist.render()
+    render_times[processes, threads] = time.time() - start
+    assert cyclist.scene_config["rendered"], f"Rendering with {processes} processes and {threads} threads failed."
+
+    print(f"{processes} processes x {threads or 'all'} threads: {render_times[processes, threads]:.1f} seconds")
+wait_for_encodings()
+
+# Single process with all cores as the baseline, or the first measurement if it has not been run
+baseline = render_times.get((1, 0), next(iter(render_times.values())))
+print(f"\n{'processes':>9} {'threads':>7} {'seconds':>8} {'speedup':>7}")
+for (processes, threads), render_time in render_times.items():
+    print(f"{processes:>9} {threads or 'all':>7} {render_time:>8.1f} {baseline / render_time:>7.2f}")
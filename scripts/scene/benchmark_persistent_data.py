@@ -0,0 +1,74 @@
+"""Measures the per-frame render time with and without Cycles' persistent data.
+
+One unicycle_cluttered scene (4-9 clutter objects) is planned for each cycle type and rendered
+once with persistent data and once rebuilding all render data for every frame.
+
+    python scripts/scene/benchmark_persistent_data.py --device CPU
+"""
+
+from copy import deepcopy
+import argparse
+import json
+import os
+
+from cyclist.cyclist import CycliST
+from cyclist.utility import parse_scene_config
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--device", type=str, default="CUDA")
+parser.add_argument("--cycles", nargs="+", type=str, default=["orbit", "recolor", "resize", "linear", "rotate"])
+parser.add_argument("--output_directory", type=str, default="output/benchmark")
+args = parser.parse_args()
+
+os.makedirs(os.path.join(args.output_directory, "scenes"), exist_ok=True)
+os.makedirs(os.path.join(args.output_directory, "videos"), exist_ok=True)
+
+frame_render_times, number_of_objects = {}, {}
+for scene_index, cycle in enumerate(args.cycles):
+    scene_config = parse_scene_config(
+        [
+            "--device",
+            args.device,
+            "--seed",
+            "0",
+            "--split",
+            "unicycle_cluttered_benchmark",
+            "--min_number_of_clutter_objects",
+            "4",
+            "--max_number_of_clutter_objects",
+            "9",
+            f"--number_of_{cycle}_cycles",
+            "1",
+            "--render_all_frames",
+            "--scene_config_directory",
+            os.path.join(args.output_directory, "scenes"),
+            "--video_directory",
+            os.path.join(args.output_directory, "videos"),
+        ]
+    )
+    scene_config["scene_index"] = scene_index
+
+    # Plan the scene once, both modes render the same plan
+    cyclist = CycliST(scene_config=scene_config)
+    assert cyclist.plan(), f"The {cycle} benchmark scene could not be generated."
+    with open(cyclist.scene_config_file_path, "r") as scene_config_file:
+        plan = json.load(scene_config_file)
+    number_of_objects[cycle] = len(plan["objects"])
+
+    for persistent_data in (False, True):
+        benchmark_config = deepcopy(plan)
+        benchmark_config["no_persistent_data"] = not persistent_data
+
+        cyclist = CycliST(scene_config=benchmark_config)
+        with open(cyclist.scene_config_file_path, "w") as scene_config_file:
+            json.dump(benchmark_config, scene_config_file, indent=2)
+        cyclist.render()
+        assert cyclist.scene_config["rendered"], f"Rendering the {cycle} benchmark scene failed."
+
+        frame_render_times[cycle, persistent_data] = cyclist.scene_config["frame_render_time"]
+        print(f"{cycle}, persistent data {persistent_data}: {frame_render_times[cycle, persistent_data]:.2f} seconds per frame")
+
+print(f"\n{'cycle':>8} {'objects':>7} {'rebuild':>8} {'persistent':>10} {'speedup':>7}")
+for cycle in args.cycles:
+    rebuild, persistent = frame_render_times[cycle, False], frame_render_times[cycle, True]
+    print(f"{cycle:>8} {number_of_objects[cycle]:>7} {rebuild:>8.2f} {persistent:>10.2f} {rebuild / persistent:>7.2f}")
@@ -0,0 +1,66 @@
+"""Measures how checking all object pairs for collisions scales with the number of objects.
+
+Objects either stay in place or orbit a random point, spread over an area that grows with their
+number, i.e., at the density of a cluttered scene. The exhaustive check compares all pairs, the broad
+phase only nearby ones, and both need to find the same pairs.
+
+    python scripts/scene/benchmark_validator.py --objects 25 50 100 200 400
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from cyclist.scene.validator import Validator
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--objects", nargs="+", type=int, default=[25, 50, 100, 200, 400])
+parser.add_argument("--frames", type=int, default=160)
+parser.add_argument("--minimum_distance", type=float, default=0.25)
+parser.add_argument("--area_per_object", type=float, default=2.0,
+                    help="The area in squared units per object, 100 / 50 for 50 clutter objects in the default scene.")
+parser.add_argument("--repetitions", type=int, default=3)
+args = parser.parse_args()
+
+rng = np.random.default_rng(0)
+angles = np.linspace(0.0, 2.0 * np.pi, args.frames, endpoint=False)[:, None]
+
+
+def measure(function, locations: np.ndarray) -> tuple[float, tuple]:
+    """Takes the fastest of multiple runs."""
+
+    times = []
+    for _ in range(args.repetitions):
+        start = time.perf_counter()
+        pairs = function(locations, args.minimum_distance)
+        times.append(time.perf_counter() - start)
+
+    return min(times), pairs
+
+
+results = []
+for number_of_objects in args.objects:
+    side = np.sqrt(number_of_objects * args.area_per_object)
+    centers = rng.uniform(-side / 2.0, side / 2.0, (1, number_of_objects, 2))
+    radii = rng.uniform(0.0, 2.0, number_of_objects) * (rng.random(number_of_objects) < 0.2)
+    locations = centers + radii[None, :, None] * np.stack([np.cos(angles), np.sin(angles)], axis=-1)
+
+    exhaustive_time, exhaustive_pairs = measure(Validator.close_pairs_exhaustive, locations)
+    broad_phase_time, broad_phase_pairs = measure(Validator.close_pairs, locations)
+    assert all(
+        np.array_equal(exhaustive, broad_phase)
+        for exhaustive, broad_phase in zip(exhaustive_pairs, broad_phase_pairs)
+    ), f"The broad phase found other pairs for {number_of_objects} objects."
+
+    results.append((number_of_objects, exhaustive_time, broad_phase_time))
+    print(f"{number_of_objects} objects: {exhaustive_time * 1000:.1f} ms exhaustive, {broad_phase_time * 1000:.1f} ms broad phase")
+
+print(f"\n{'objects':>7} {'exhaustive ms':>13} {'broad phase ms':>14} {'speedup':>7}")
+for number_of_objects, exhaustive_time, broad_phase_time in results:
+    print(f"{number_of_objects:>7} {exhaustive_time * 1000:>13.1f} {broad_phase_time * 1000:>14.1f} {exhaustive_time / broad_phase_time:>7.2f}")
+
+# The slope of the log-log fit is the exponent of the scaling in the number of objects
+objects, exhaustive_times, broad_phase_times = np.log(np.array(results)).T
+print(f"\nScaling exponent: exhaustive {np.polyfit(objects, exhaustive_times, 1)[0]:.2f}, "
+      f"broad phase {np.polyfit(objects, broad_phase_times, 1)[0]:.2f}")
@@ -8,6 +8,8 @@ import matplotlib.pyplot as plt
 import pandas as pd
 import seaborn as sns
 
+from cyclist.utility import expand_relationships
+
 
 def plot_spatial_relations(json_path: str, output_dir: str):
     """
@@ -47,7 +49,7 @@ def plot_spatial_relations(json_path: str, output_dir: str):
     combined_relations = {}
 
     # First, gather all relations for each pair at each frame
-    for relation, frames in config["relationships"].items():
+    for relation, frames in expand_relationships(config).items():
         if relation in ["above", "below"]:
             continue
         for frame, pairs in frames.items():